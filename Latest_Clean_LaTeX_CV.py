@@ -15,8 +15,23 @@ import string
 import datetime
 import os 
 import datetime
+import zipfile
+import zlib
+import hashlib
+import marshal
+import io
+import bisect
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import unicodedata
+from contextlib import contextmanager
+import xml.etree.ElementTree as ET
 from docx import Document 
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 import unidecode
 
 
@@ -59,12 +74,9 @@ def process_student_thesis_titles(text):
 
 
 def replace_problematic_characters_in_titles(student_data):
-    problematic_char = u'\u2013'  # En dash (U+2013)
-
+    # En dashes, accents and LaTeX specials in the titles
     for name, title in student_data.items():
-        if problematic_char in title:
-            #print(f"Found character '{problematic_char}' in {name}: {title}")
-            student_data[name] = title.replace(problematic_char, '--')
+        student_data[name] = latex_escape(title)
 
     return student_data
 
@@ -252,32 +264,23 @@ def reformat_sections(text_data):
     
     return text_data
 
-def extract_undergrad_student_titles(file_path):
-    #file_path = r"C:\Users\rhk12\OneDrive - The Pennsylvania State University\resume\CV\20231021-095357-CDT.docx"
-
-    # Check if the file exists
-    if not os.path.exists(file_path):
-        return f"File not found at '{file_path}'"
-    
-    # If the file exists, proceed to read its content
-    doc = Document(file_path)
-    full_text = [para.text for para in doc.paragraphs]
+def extract_undergrad_student_titles(dossier):
+    # Use the paragraphs of the already parsed dossier
+    full_text = dossier.paragraphs
 
     # Define the sub-section titles
     sub_section_title = "Undergraduate Honors Thesis Advisor"
     end_section_title = "THE SCHOLARSHIP OF Research and Creative Accomplishments"
 
     # Find the start of the sub-section
-    start_index = next((i for i, text in enumerate(full_text) if sub_section_title in text), None)
+    start_index = dossier.find_paragraph(sub_section_title)
     if start_index is None:
         return {}
 
     # Find the end of the sub-section
-    end_index = next((i for i, text in enumerate(full_text[start_index:]) if end_section_title in text), None)
+    end_index = dossier.find_paragraph(end_section_title, start_index)
     if end_index is None:
         end_index = len(full_text)
-    else:
-        end_index += start_index
 
     # Extract undergrad student names and thesis titles
     undergrad_data = {}
@@ -715,10 +718,11 @@ def add_custom_package(text, package_name="mystyle"):
         text = text[:insert_pos] + f"\\usepackage{{{package_name}}}\n" + text[insert_pos:]
     
     return text
-def format_header(text_content):
+def format_header(text_content, owner=None):
+    display_name = latex_escape((owner or DEFAULT_OWNER).display_name)
     new_header = r"""
 \begin{center}
-\LARGE \textbf{\textsc{REUBEN H. KRAFT}} \\
+\LARGE \textbf{\textsc{""" + display_name + r"""}} \\
 \rule{\linewidth}{2pt}
 \end{center}
 \normalsize % Return to the default font size
@@ -840,124 +844,6 @@ def clean_service_section(text_data):
     
     return text_data
 
-def highlight_mentored_authors_astericks2(text_data):
-    # Extract last names of mentored students and postdocs
-    student_types = {
-        'Ph.D. Dissertation': 'Ph.D. students',
-        'Master\'s Thesis': 'Master students',
-        'Postdoctoral Mentorship': 'Postdoc researchers',
-        'Undergraduate Honors\nThesis': 'Undergrad students'
-    }
-    
-    mentored_lastnames = []
-
-    for subsection, label in student_types.items():
-        start_index = text_data.find(rf'\subsubsection{{{subsection}}}')
-        if start_index == -1:
-            match = re.search(re.escape(subsection), text_data)
-            if match:
-                start_index = match.start()
-            else:
-                continue
-
-        end_index = text_data.find(r'\subsubsection{', start_index + 1)
-        if end_index == -1:
-            end_index = len(text_data)
-
-        section = text_data[start_index:end_index]
-        pattern = r"\\item\s+(.*?),\s+``"
-        matches = re.findall(pattern, section, re.DOTALL)
-        
-        for full_name in matches:
-            lastname = full_name.split()[-1]
-            mentored_lastnames.append(lastname)
-
-    # Search through each publication and look for these last names
-    start_publications = text_data.find(r'\subsection{Publications}')
-    end_publications = text_data.find(r'\subsection{', start_publications + 1)
-    if end_publications == -1:
-        end_publications = len(text_data)
-
-    publications_section = text_data[start_publications:end_publications]
-
-    # Add a LaTeX asterisk after the name if it's found
-    for lastname in mentored_lastnames:
-        # Modified pattern to account for an optional middle initial
-        pattern = rf"({lastname}(?:, [A-Z]\. ?[A-Z]?)?)"
-        replacement = r"\1\\textsuperscript{*}"
-        publications_section = re.sub(pattern, replacement, publications_section)
-
-    # Replace the old publications section with the modified one
-    modified_text = text_data[:start_publications] + publications_section + text_data[end_publications:]
-
-    # Add mentored student note
-    journal_article_section_start = modified_text.find(r'\subsubsection{Journal Article}\label{journal-article}')
-    if journal_article_section_start == -1:
-        print("Journal Article section not found in the text.")
-        return modified_text
-
-    note_text = "\n\\textit{Mentored student and postdoc co-authors have an astericks after their name.}\n"
-    modified_text = modified_text[:journal_article_section_start] + note_text + modified_text[journal_article_section_start:]
-
-    return modified_text
-
-def underline_mentored_authors_with_note(text_data):
-    # Extract last names of mentored students and postdocs
-    student_types = {
-        'Ph.D. Dissertation': 'Ph.D. students',
-        'Master\'s Thesis': 'Master students',
-        'Postdoctoral Mentorship': 'Postdoc researchers',
-        'Undergraduate Honors\nThesis': 'Undergrad students'
-    }
-    
-    mentored_lastnames = []
-
-    for subsection, label in student_types.items():
-        start_index = text_data.find(rf'\subsubsection{{{subsection}}}')
-        if start_index == -1:
-            match = re.search(re.escape(subsection), text_data)
-            if match:
-                start_index = match.start()
-            else:
-                continue
-
-        end_index = text_data.find(r'\subsubsection{', start_index + 1)
-        if end_index == -1:
-            end_index = len(text_data)
-
-        section = text_data[start_index:end_index]
-        pattern = r"\\item\s+(.*?),\s+``"
-        matches = re.findall(pattern, section, re.DOTALL)
-        
-        for full_name in matches:
-            lastname = full_name.split()[-1]
-            mentored_lastnames.append(lastname)
-
-    # Search through each publication and look for these last names
-    start_publications = text_data.find(r'\subsection{Publications}')
-    end_publications = text_data.find(r'\subsection{', start_publications + 1)
-    if end_publications == -1:
-        end_publications = len(text_data)
-
-    publications_section = text_data[start_publications:end_publications]
-
-    # Add a LaTeX note about underlining mentored authors
-    note_text = "\n\\textit{Mentored student and postdoc co-authors are underlined.}\n"
-    journal_article_section_start = publications_section.find(r'\subsubsection{Journal Article}\label{journal-article}')
-    publications_section = publications_section[:journal_article_section_start] + note_text + publications_section[journal_article_section_start:]
-
-    # Underline the name if it's found
-    for lastname in mentored_lastnames:
-        # Modified pattern to account for an optional middle initial
-        pattern = rf"({lastname}(?:, [A-Z]\. ?[A-Z]?)?)"
-        replacement = r"\\underline{\1}"
-        publications_section = re.sub(pattern, replacement, publications_section)
-
-    # Replace the old publications section with the modified one
-    modified_text = text_data[:start_publications] + publications_section + text_data[end_publications:]
-
-    return modified_text
-
 def create_custom_titles_for_sections(text_data):
     
     # change the title of the Jounral Article section
@@ -1325,7 +1211,11 @@ def update_documentclass_font_size(latex_content, font_size):
 
 def create_template_latex_file(filename):
     with open(filename, 'w') as file:
-        file.write(r"""
+        file.write(latex_template())
+
+def latex_template():
+    # The pandoc-style article preamble with an empty document body
+    return r"""
 \documentclass[a4paper,10pt]{article}
 \usepackage[a4paper, margin=1in]{geometry}
 \usepackage{amsmath,amssymb}
@@ -1383,8 +1273,231 @@ def create_template_latex_file(filename):
 \date{}
 \begin{document}
 \end{document}
-""")
-        
+"""
+
+def latex_preamble(owner=None):
+    # The template with the style package, section colors, the owner's name and the date
+    text = add_custom_package(latex_template())
+    text = set_section_colors(text)
+    text = format_header(text, owner)
+    return add_date_to_header(text)
+
+class PipelineStats:
+    """
+    Wall and CPU time per pipeline stage plus named counters.
+
+    CPU time is the time of the thread that ran the stage, so the numbers stay
+    per-stage when sections are rendered on a thread pool.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.regex = {}
+
+    @contextmanager
+    def stage(self, name):
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+
+    def add_timing(self, name, wall, cpu, calls=1):
+        timing = self.timings.setdefault(name, [0.0, 0.0, 0])
+        timing[0] += wall
+        timing[1] += cpu
+        timing[2] += calls
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_regex_call(self, name, seconds, calls=1):
+        pattern = self.regex.setdefault(name, [0, 0.0])
+        pattern[0] += calls
+        pattern[1] += seconds
+
+    def merge(self, other):
+        for name, (wall, cpu, calls) in other.timings.items():
+            self.add_timing(name, wall, cpu, calls)
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        for name, (calls, seconds) in other.regex.items():
+            self.add_regex_call(name, seconds, calls)
+
+    def as_dict(self):
+        return {
+            "stages": [{"name": name, "wall_seconds": wall, "cpu_seconds": cpu, "calls": calls}
+                       for name, (wall, cpu, calls) in self.timings.items()],
+            "counters": dict(sorted(self.counters.items())),
+            "regex": [{"name": name, "calls": calls, "seconds": seconds}
+                      for name, (calls, seconds) in sorted(self.regex.items(), key=lambda item: -item[1][1])],
+        }
+
+    def format_table(self):
+        width = max([len(name) for name in list(self.timings) + list(self.counters) + list(self.regex)] + [5])
+        lines = [f"{'Stage':<{width}}  {'Wall (s)':>9}  {'CPU (s)':>9}  {'Calls':>5}"]
+        for name, (wall, cpu, calls) in self.timings.items():
+            lines.append(f"{name:<{width}}  {wall:9.4f}  {cpu:9.4f}  {calls:5d}")
+        total_wall = sum(timing[0] for timing in self.timings.values())
+        total_cpu = sum(timing[1] for timing in self.timings.values())
+        lines.append(f"{'total':<{width}}  {total_wall:9.4f}  {total_cpu:9.4f}")
+        lines.append("")
+        lines.append(f"{'Counter':<{width}}  {'Value':>9}")
+        for name, amount in sorted(self.counters.items()):
+            lines.append(f"{name:<{width}}  {amount:9d}")
+        if self.regex:
+            # Slowest pattern first
+            lines.append("")
+            lines.append(f"{'Regex':<{width}}  {'Time (s)':>9}  {'Calls':>9}")
+            for name, (calls, seconds) in sorted(self.regex.items(), key=lambda item: -item[1][1]):
+                lines.append(f"{name:<{width}}  {seconds:9.4f}  {calls:9d}")
+        return "\n".join(lines)
+
+# Stats of the whole run; a section stage running on a worker gets its own
+# PipelineStats (see _stats_local) that is merged back when the stage finishes
+PIPELINE_STATS = PipelineStats()
+_stats_local = threading.local()
+
+def current_stats():
+    return getattr(_stats_local, "stats", None) or PIPELINE_STATS
+
+def record_counter(name, amount=1):
+    current_stats().count(name, amount)
+
+class RegexRegistry:
+    """
+    Named patterns, compiled once when the module is imported.
+
+    With `profile` set, every call is counted and timed per pattern name in the
+    current PipelineStats, so the numbers follow a section stage onto its worker.
+    """
+
+    def __init__(self):
+        self.patterns = {}
+        self.profile = False
+
+    def add(self, name, pattern, flags=0):
+        if name in self.patterns:
+            raise ValueError(f"Regex '{name}' is already registered")
+        self.patterns[name] = re.compile(pattern, flags)
+        return self.patterns[name]
+
+    def _call(self, name, call):
+        pattern = self.patterns[name]
+        if not self.profile:
+            return call(pattern)
+        start = time.perf_counter()
+        try:
+            return call(pattern)
+        finally:
+            current_stats().add_regex_call(name, time.perf_counter() - start)
+
+    def search(self, name, text):
+        return self._call(name, lambda pattern: pattern.search(text))
+
+    def match(self, name, text):
+        return self._call(name, lambda pattern: pattern.match(text))
+
+    def findall(self, name, text):
+        return self._call(name, lambda pattern: pattern.findall(text))
+
+    def finditer(self, name, text):
+        # A list when profiling, so the timed call covers the whole scan
+        if self.profile:
+            return self._call(name, lambda pattern: list(pattern.finditer(text)))
+        return self.patterns[name].finditer(text)
+
+    def sub(self, name, replacement, text, count=0):
+        # re.sub that also counts the substitutions it made
+        text, substitutions = self._call(name, lambda pattern: pattern.subn(replacement, text, count))
+        if substitutions:
+            record_counter("regex substitutions", substitutions)
+        return text
+
+REGEX = RegexRegistry()
+
+END_DOCUMENT = "\\end{document}"
+
+class LatexDocument:
+    """
+    Collects the LaTeX document as an ordered list of fragments joined once by render().
+
+    The section builders were written against a plain string: strip \\end{document},
+    append the new section, append \\end{document} again. Each of those steps copies and
+    rescans the whole document. The builder supports the same steps without touching
+    earlier fragments: `+=` appends a fragment, \\end{document} is tracked by fragment
+    position so removing it only trims those entries, and strip() only trims the first
+    and last fragments. Rendering gives exactly the string the old steps produced.
+    """
+
+    def __init__(self, text=""):
+        self.fragments = []
+        self._end_positions = []
+        self.append(text)
+
+    def append(self, fragment):
+        # Keep every \end{document} as a separate fragment so it can be removed in place
+        pieces = fragment.split(END_DOCUMENT)
+        for i, piece in enumerate(pieces):
+            if i > 0:
+                self._end_positions.append(len(self.fragments))
+                self.fragments.append(END_DOCUMENT)
+            if piece:
+                self.fragments.append(piece)
+        return self
+
+    def __iadd__(self, fragment):
+        return self.append(fragment)
+
+    def has_end_document(self):
+        return bool(self._end_positions)
+
+    def remove_end_document(self):
+        # \end{document} is always the tail of the fragments recorded in _end_positions
+        for position in self._end_positions:
+            self.fragments[position] = self.fragments[position][:-len(END_DOCUMENT)]
+        self._end_positions = []
+        return self
+
+    def insert_before_end_document(self, fragment):
+        # Same as str.replace(END_DOCUMENT, fragment + END_DOCUMENT)
+        for position in self._end_positions:
+            self.fragments[position] = self.fragments[position][:-len(END_DOCUMENT)] + fragment + END_DOCUMENT
+        return self
+
+    def strip(self):
+        # Same as str.strip() on the rendered text, touching only the outer fragments
+        fragments = self.fragments
+        for i in range(len(fragments)):
+            fragments[i] = fragments[i].lstrip()
+            if fragments[i]:
+                break
+        for i in range(len(fragments) - 1, -1, -1):
+            fragments[i] = fragments[i].rstrip()
+            if fragments[i]:
+                break
+        return self
+
+    def render(self):
+        return "".join(self.fragments)
+
+def remove_end_document(latex_text):
+    # latex_text.replace("\end{document}", "").strip() for a string or a LatexDocument
+    if isinstance(latex_text, LatexDocument):
+        return latex_text.remove_end_document().strip()
+    return latex_text.replace(END_DOCUMENT, "").strip()
+
+def has_end_document(latex_text):
+    if isinstance(latex_text, LatexDocument):
+        return latex_text.has_end_document()
+    return END_DOCUMENT in latex_text
+
+def insert_before_end_document(latex_text, fragment):
+    if isinstance(latex_text, LatexDocument):
+        return latex_text.insert_before_end_document(fragment)
+    return latex_text.replace(END_DOCUMENT, fragment + END_DOCUMENT)
 
 def add_custom_package(text_content, package_name="mystyle"):
     insertion_point = text_content.find(r'\author{')
@@ -1433,42 +1546,97 @@ def read_word_document(file_path):
     
     return '\n'.join(full_text), table_data
 
-def extract_text_between_markers(full_text, start_marker, end_marker):
-    # Escape special characters in start and end markers for regex
-    start_marker = re.escape(start_marker)
-    end_marker = re.escape(end_marker)
-    
-    # Compile the regex pattern
-    pattern = re.compile(f'{start_marker}(.*?){end_marker}', re.DOTALL)
-    # Search for the pattern
-    match = pattern.search(full_text)
-    if match:
-        
-        return match.group(1).strip()
-    else:
-        return ""
+# Characters of a marker's start used to look up the markers that may begin at a position
+SECTION_MARKER_PREFIX = 4
 
-def extract_text_up_to_end_marker(word_text, start_marker, end_marker):
+class SectionIndex:
     """
-    Extract the text starting from the `start_marker` to the `end_marker`, inclusive of the end marker.
+    Positions of every known section marker in a dossier text, found in one scan.
+
+    The scan only stops at characters that start some marker; there the next few
+    characters pick the markers sharing that prefix and startswith() confirms
+    them, so overlapping markers (e.g. "Posters" and "Posters and Oral
+    Presentations") are all reported and adding markers mostly adds dictionary
+    entries rather than passes over the text. A section is then a bisect plus a
+    slice, and each result is memoized.
     """
-    # Find the position of the start_marker and end_marker
-    start_pos = word_text.find(start_marker)
-    if start_pos == -1:
-        return None  # Start marker not found
-    
-    end_pos = word_text.find(end_marker, start_pos)
-    if end_pos == -1:
-        return None  # End marker not found
-    
-    # Extract the text from the start_marker to the end_marker (inclusive)
-    return word_text[start_pos:end_pos + len(end_marker)]
 
+    def __init__(self, text, markers=()):
+        self.text = text
+        self._positions = {}
+        self._sections = {}
+        self.add_markers(markers)
+
+    def add_markers(self, markers):
+        markers = [marker for marker in set(markers) if marker and marker not in self._positions]
+        if not markers:
+            return
+
+        # Markers are grouped by their first few characters so each hit only checks a few candidates
+        prefix = min(SECTION_MARKER_PREFIX, min(len(marker) for marker in markers))
+        candidates = defaultdict(list)
+        for marker in markers:
+            candidates[marker[:prefix]].append(marker)
+            self._positions[marker] = []
+
+        first_characters = re.compile("[" + "".join(re.escape(character) for character in {marker[0] for marker in markers}) + "]")
+        text = self.text
+        for match in first_characters.finditer(text):
+            pos = match.start()
+            for marker in candidates.get(text[pos:pos + prefix], ()):
+                if text.startswith(marker, pos):
+                    self._positions[marker].append(pos)
+
+    def positions(self, marker):
+        if marker not in self._positions:
+            # Markers not registered up front are indexed on first use
+            self.add_markers([marker])
+        return self._positions[marker]
+
+    def find(self, marker, start=0):
+        # Same result as str.find, answered from the index
+        positions = self.positions(marker)
+        index = bisect.bisect_left(positions, start)
+        return positions[index] if index < len(positions) else -1
+
+    def between(self, start_marker, end_marker):
+        key = (start_marker, end_marker)
+        if key not in self._sections:
+            # First start marker, then the first end marker after it (the old non-greedy regex)
+            start_pos = self.find(start_marker)
+            end_pos = -1
+            if start_pos != -1:
+                start_pos += len(start_marker)
+                end_pos = self.find(end_marker, start_pos)
+            self._sections[key] = self.text[start_pos:end_pos].strip() if end_pos != -1 else ""
+        return self._sections[key]
+
+# One index per dossier text, shared by every section builder
+_section_indexes = {}
+
+def get_section_index(full_text):
+    index = _section_indexes.get(full_text)
+    if index is None:
+        if len(_section_indexes) >= 8:
+            _section_indexes.clear()
+        index = SectionIndex(full_text, known_section_markers())
+        _section_indexes[full_text] = index
+    return index
+
+def extract_text_between_markers(full_text, start_marker, end_marker):
+    # Served from the section index, the dossier text is scanned once for all markers
+    return get_section_index(full_text).between(start_marker, end_marker)
+
+# Dossier markers around the list of courses taught
+REGEX.add("semester", r'(Spring|Summer|Fall) \d{4}')
+REGEX.add("course number", r'M\s*E\s*(\d{3})')
+
+COURSE_MARKERS = ("List of Credit Courses Taught at Penn State for Each Semester with Enrollments in Each Course",
+                  "Concise Compilation of Results of Student Feedback from Multiple Sources")
 
 def process_courses_from_word(word_text, latex_text):
     # Define markers for extraction
-    start_marker = "List of Credit Courses Taught at Penn State for Each Semester with Enrollments in Each Course"
-    end_marker = "Concise Compilation of Results of Student Feedback from Multiple Sources"
+    start_marker, end_marker = COURSE_MARKERS
 
     # Extract the relevant courses section
     relevant_text = extract_text_between_markers(word_text, start_marker, end_marker)
@@ -1490,12 +1658,11 @@ def process_courses_from_word(word_text, latex_text):
     current_year = None
     for line in relevant_text.split('\n'):
         # Match the year (Spring, Summer, Fall Year)
-        if re.match(r'(Spring|Summer|Fall) \d{4}', line):
+        if REGEX.match("semester", line):
             current_year = line.split()[-1]
         # Match the course number (ME XXX), allowing spaces between M and E
-        elif re.match(r'M\s*E\s*\d{3}', line):
-            match = re.search(r'M\s*E\s*(\d{3})', line)
-            course_num = match.group(1)
+        elif (course_match := REGEX.match("course number", line)):
+            course_num = course_match.group(1)
             if course_num not in excluded_courses:
                 description = course_descriptions.get(course_num, f"ME {course_num}")
                 if current_year:
@@ -1519,14 +1686,15 @@ def process_courses_from_word(word_text, latex_text):
         formatted_courses = []
         for course_num, description in sorted_courses:
             if course_num:
-                formatted_courses.append(f"ME {course_num} ({description})")
+                formatted_courses.append(f"ME {course_num} ({latex_escape(description)})")
             else:
-                formatted_courses.append(f"{description}")
+                formatted_courses.append(latex_escape(description))
         # Add the courses, separated by commas
         new_course_section += ', '.join(formatted_courses) + '\n\n'
+        record_counter("entries: teaching", len(formatted_courses))
 
     # Insert the new course section before \end{document}
-    new_text = latex_text.replace("\\end{document}", new_course_section + "\\end{document}")
+    new_text = insert_before_end_document(latex_text, new_course_section)
     
     return new_text
 
@@ -1579,167 +1747,614 @@ def process_courses_from_word(word_text, latex_text):
    
 #     return new_text
 
-def format_publication_entry(publication):
-    # Extract the DOI and format it as a URL
-    
-    doi_match = re.search(r"DOI: (\S+)", publication)
-    if doi_match:
-        doi_url = f"\\url{{https://doi.org/{doi_match.group(1)}}}"
-        publication = re.sub(r"DOI: \S+", "", publication)
-    else:
-        doi_url = ""
-    # Adding emphasis to the author name "Kraft, R. H."
-    publication = re.sub(r'(Kraft,)( R\.\s*H\.)', r'\\textbf{\\textbf{\1}\2}', publication)
-    
-
-    # Combine the formatted publication entry
-    formatted_entry = f"\\item {publication.strip()} {doi_url}".strip()
-    formatted_entry = formatted_entry.replace('&', '&\n')
-    return formatted_entry
-
-def replace_special_characters(text):
-    # Mapping of accented characters to LaTeX-friendly equivalents
-    replacements = {
-        'á': r"\'a",
-        'é': r"\'e",
-        'í': r"\'i",
-        'ó': r"\'o",
-        'ú': r"\'u",
-        'ñ': r"\~n",
-        'ü': r"\"u",
-        'Á': r"\'A",
-        'É': r"\'E",
-        'Í': r"\'I",
-        'Ó': r"\'O",
-        'Ú': r"\'U",
-        'Ñ': r"\~N",
-        'Ü': r"\"U",
-        'ç': r"\c{c}",
-        'Ç': r"\c{C}",
-        'ö': r"\"o",
-        'Ö': r"\"O",
-        # Add other replacements as needed
-        '’': "'",
-    }
-    
-    # Replace characters in the text
-    for char, latex_equiv in replacements.items():
-        text = text.replace(char, latex_equiv)
-    
-    return text
+REGEX.add("doi", r"DOI: (\S+)")
+
+# Seconds allowed for annotating the students of one publication entry, None for no limit
+STUDENT_ENTRY_TIME_BUDGET = None
+
+# LaTeX escaping, shared by every section builder. Dossier text is escaped once,
+# before any LaTeX markup is added around it.
+LATEX_SPECIAL_CHARACTERS = {
+    '\\': r"\textbackslash{}",
+    '&': r"\&",
+    '%': r"\%",
+    '$': r"\$",
+    '#': r"\#",
+    '_': r"\_",
+    '{': r"\{",
+    '}': r"\}",
+    '~': r"\textasciitilde{}",
+    '^': r"\textasciicircum{}",
+}
+
+# Combining marks and the LaTeX accent command for each; the letter-named
+# commands need braces around the base letter
+LATEX_ACCENTS = {
+    '̀': "`", '́': "'", '̂': "^", '̃': "~", '̄': "=",
+    '̇': ".", '̈': '"', '̆': "u", '̊': "r", '̋': "H",
+    '̌': "v", '̣': "d", '̧': "c", '̨': "k",
+}
+
+LATEX_LETTERS = {
+    'ß': r"\ss{}", 'æ': r"\ae{}", 'Æ': r"\AE{}", 'ø': r"\o{}", 'Ø': r"\O{}",
+    'œ': r"\oe{}", 'Œ': r"\OE{}", 'ł': r"\l{}", 'Ł': r"\L{}", 'ı': r"\i{}",
+    'ð': r"\dh{}", 'Ð': r"\DH{}", 'þ': r"\th{}", 'Þ': r"\TH{}", 'đ': r"\dj{}",
+    'Đ': r"\DJ{}", 'ŋ': r"\ng{}", 'Ŋ': r"\NG{}",
+}
+
+LATEX_PUNCTUATION = {
+    ' ': "~", '­': r"\-", '‘': "`", '’': "'", '“': "``",
+    '”': "''", '–': "--", '—': "---", '…': r"\ldots{}",
+    '•': r"\textbullet{}", '¡': r"\textexclamdown{}", '¿': r"\textquestiondown{}",
+    '«': r"\guillemotleft{}", '»': r"\guillemotright{}", '§': r"\S{}",
+    '¶': r"\P{}", '©': r"\textcopyright{}", '®': r"\textregistered{}",
+    '°': r"\textdegree{}", '±': r"\textpm{}", '×': r"\texttimes{}",
+    '÷': r"\textdiv{}", 'µ': r"\textmu{}", '·': r"\textperiodcentered{}",
+    '¢': r"\textcent{}", '£': r"\pounds{}", '¥': r"\textyen{}",
+    '€': r"\texteuro{}", '¹': r"\textsuperscript{1}", '²': r"\textsuperscript{2}",
+    '³': r"\textsuperscript{3}", '¼': r"\textonequarter{}", '½': r"\textonehalf{}",
+    '¾': r"\textthreequarters{}",
+}
+
+def latex_accented_letters(first=0xC0, last=0x24F):
+    # Latin-1 Supplement and Latin Extended-A/B letters that decompose into an
+    # ASCII letter plus one accent, e.g. é -> \'e and č -> \v{c}
+    letters = {}
+    for code in range(first, last + 1):
+        decomposed = unicodedata.normalize('NFD', chr(code))
+        if len(decomposed) != 2 or not decomposed[0].isascii() or decomposed[1] not in LATEX_ACCENTS:
+            continue
+        base, accent = decomposed[0], LATEX_ACCENTS[decomposed[1]]
+        letters[chr(code)] = f"\\{accent}{{{base}}}" if accent.isalpha() else f"\\{accent}{base}"
+    return letters
+
+# Built once; escaping is then a single str.translate pass per string
+LATEX_ESCAPE_TABLE = str.maketrans({**LATEX_SPECIAL_CHARACTERS, **latex_accented_letters(),
+                                    **LATEX_LETTERS, **LATEX_PUNCTUATION})
+
+def latex_escape(text):
+    return text.translate(LATEX_ESCAPE_TABLE)
+
+class OwnerProfile:
+    """
+    Whose CV is being built: the name in the header, the ways the dossier writes
+    the owner as an author, the current title and the dossier lines to leave out.
+
+    The author variants are kept without spacing, so matching a parsed author
+    name is a set lookup.
+    """
+
+    def __init__(self, display_name, name_variants, title, title_dates="", filter_lines=()):
+        self.display_name = display_name
+        self.name_variants = tuple(name_variants)
+        self.title = title
+        self.title_dates = title_dates
+        self.filter_lines = frozenset(filter_lines)
+        # "Kraft, R. H." also matches "Kraft, R.H."
+        self.author_names = frozenset("".join(variant.split()) for variant in self.name_variants)
+
+    def __repr__(self):
+        # Stable, so it can be part of an incremental build key
+        return (f"OwnerProfile(display_name={self.display_name!r}, name_variants={list(self.name_variants)!r}, "
+                f"title={self.title!r}, title_dates={self.title_dates!r}, filter_lines={sorted(self.filter_lines)!r})")
+
+    @classmethod
+    def load(cls, path):
+        # A JSON object with the __init__ arguments as keys
+        with open(path, 'r') as file:
+            fields = json.load(file)
+        try:
+            return cls(**fields)
+        except TypeError as error:
+            raise ValueError(f"Invalid owner profile {path}: {error}") from None
+
+    def is_author(self, name):
+        # Whether a parsed author name is one of the owner's variants, spacing aside
+        return "".join(name.split()) in self.author_names
+
+    def current_title(self):
+        dates = f" ({self.title_dates})" if self.title_dates else ""
+        return f"{self.title}.{dates}."
+
+DEFAULT_OWNER = OwnerProfile(
+    display_name="REUBEN H. KRAFT",
+    name_variants=["Kraft, R. H."],
+    title="Professor of Mechanical Engineering",
+    title_dates="July 2024 - Present",
+    filter_lines=[
+        'Agency: Triad National Security, LLC (was LANL - Los Alamos National Laboratory)',
+        'Principal Investigator: Kraft, Reuben H.',
+        'Project Title: Elucidating high strain rate deformation mechanisms in penetration-resistant composites.',
+        'Won Best Poster Award',
+    ],
+)
 
 
 import re
 
 import re
 
-def extract_publications(word_text, latex_text):
-    start_marker_journal = "Journal Article"
-    end_marker_journal = "Parts of Books"
-    start_marker_conference = "Conference Proceedings"
-    end_marker_conference = "Other Works"
-    start_marker_book = "Book Chapter"
-    end_marker_book = "Refereed Conference Proceedings"
-    start_marker_other = "Other Works"
-    end_marker_other = "Manuscripts Submitted for Publication"
-
-    journal_publications = extract_text_between_markers(word_text, start_marker_journal, end_marker_journal)
-    conference_publications = extract_text_between_markers(word_text, start_marker_conference, end_marker_conference)
-    book_chapters = extract_text_between_markers(word_text, start_marker_book, end_marker_book)
-    other_publications = extract_text_between_markers(word_text, start_marker_other, end_marker_other)
-    
-    def underline_students(text):
-        # Regular expression to capture names with "Graduate Student" or "Undergraduate Student" designation
-        student_pattern = r'([A-Z][a-zA-Z\s\.,]+) \((?:Primary Author|Co-Author|Student Author) - (Graduate Student|Undergraduate Student|Postdoctoral Student)\)'
-        # Replace matched patterns with LaTeX underline command
-        return re.sub(student_pattern, r'\\underline{\1}', text)
+# Dossier markers around each publication category
+PUBLICATION_MARKERS = {
+    "Journal Article": ("Journal Article", "Parts of Books"),
+    "Conference Proceeding": ("Conference Proceedings", "Other Works"),
+    "Book Chapters": ("Book Chapter", "Refereed Conference Proceedings"),
+    "Other": ("Other Works", "Manuscripts Submitted for Publication"),
+}
 
-    latex_output = r"""
-\subsection{PUBLICATIONS}\label{publications}
+REGEX.add("entry number", r'\s*(\d+)\.\s*')
+REGEX.add("entry year", r'\((?:[A-Z][a-z]+\.? )?(\d{4})[a-z]?\)\.?')
+REGEX.add("last author", r'.*?&\s*[^,&()]+,(?:\s*[A-Z][a-zA-Z]?\.(?:-[A-Z]\.)?)+(?:\s*\([^()]*\))*')
+# Author list separators; a parenthesised role is one token, so "(Author, Presenter)" does not split
+REGEX.add("author separator", r'\([^()]*\)|[,&]')
+REGEX.add("student role", r'\((?:Primary Author|Co-Author|Student Author) - (?:Graduate|Undergraduate|Postdoctoral) Student\)')
 
-\subsubsection{Journal Article}\label{journal-article}
+def author_fields(author_text, entry=""):
+    """
+    ((surname start, end), (given names start, end), (roles start, end)) for each
+    "Surname, Given (role)" of an author list, in one pass over its "," and "&"
+    separators, so the cost stays linear however the list is written. With
+    STUDENT_ENTRY_TIME_BUDGET set, a list taking longer is reported and its
+    remaining authors are left unparsed.
+    """
+    # Text between separators, then pairs of fields: the surname and the given names with their roles
+    fields = []
+    start = 0
+    for token in REGEX.finditer("author separator", author_text):
+        if token.group() in ",&":
+            fields.append((start, token.start()))
+            start = token.end()
+    fields.append((start, len(author_text)))
+
+    def stripped(start, end):
+        while start < end and author_text[start].isspace():
+            start += 1
+        while end > start and author_text[end - 1].isspace():
+            end -= 1
+        return start, end
+
+    authors = []
+    started = time.perf_counter()
+    index = 0
+    while index + 1 < len(fields):
+        surname = stripped(*fields[index])
+        if surname[0] == surname[1] or "(" in author_text[surname[0]:surname[1]]:
+            # Empty between ", &", or not a name
+            index += 1
+            continue
+        given_start, given_end = fields[index + 1]
+        roles_start = author_text.find("(", given_start, given_end)
+        if roles_start == -1:
+            roles_start = given_end
+        authors.append((surname, stripped(given_start, roles_start), (roles_start, given_end)))
+        index += 2
+
+        if STUDENT_ENTRY_TIME_BUDGET is not None and time.perf_counter() - started > STUDENT_ENTRY_TIME_BUDGET:
+            record_counter("slow student entries")
+            print(f"Student annotation exceeded {STUDENT_ENTRY_TIME_BUDGET}s, rest of the entry left as is: {entry[:80]}...")
+            break
+    return authors
 
-\begin{enumerate}
-\def\labelenumi{\arabic{enumi}.}
-"""
+class Publication:
+    """
+    One dossier entry parsed into its parts.
+
+    `body` is the entry as written minus its DOI, the other fields are for
+    sorting, filtering and counting without re-parsing. `spans` holds, per
+    author, where the name and its student tag (or None) sit in the stripped
+    body and `text_start` where the text after the dossier numbering starts,
+    so latex() marks authors by position instead of searching the entry again.
+    Slots keep a record small when a batch holds tens of thousands of them.
+    """
 
-    for publication in journal_publications.split("\n"):
-        if publication.strip():
-            # Clean up and format publication entry
-            publication = replace_special_characters(format_publication_entry(publication))
-            publication = underline_students(publication)  # Apply underline to student names
-            formatted_publication = publication.replace("&", r"\&")
+    __slots__ = ("category", "number", "authors", "student_authors", "year", "title", "venue", "doi", "body",
+                 "spans", "text_start")
+
+    def __init__(self, category, body, number=None, authors=(), student_authors=(), year=None,
+                 title="", venue="", doi=None, spans=(), text_start=0):
+        self.category = category
+        self.body = body
+        self.number = number
+        self.authors = authors
+        self.student_authors = student_authors
+        self.year = year
+        self.title = title
+        self.venue = venue
+        self.doi = doi
+        self.spans = spans
+        self.text_start = text_start
+
+    @classmethod
+    def from_entry(cls, entry, category):
+        doi_match = REGEX.search("doi", entry)
+        doi = doi_match.group(1) if doi_match else None
+        body = REGEX.sub("doi", "", entry) if doi_match else entry
+
+        text = body.strip()
+        number_match = REGEX.match("entry number", text)
+        number = None
+        offset = text_start = 0
+        if number_match:
+            number = int(number_match.group(1))
+            # latex() keeps what follows "12." as written, the rest is parsed
+            text_start = number_match.end(1) + 1
+            offset = number_match.end()
+            text = text[offset:]
+
+        # Authors come before the year, or up to the last author after "&" when there is no year
+        year = None
+        year_match = REGEX.search("entry year", text)
+        if year_match:
+            year = int(year_match.group(1))
+            author_text, rest = text[:year_match.start()], text[year_match.end():]
+        else:
+            last_author = REGEX.match("last author", text)
+            split = last_author.end() if last_author else 0
+            author_text, rest = text[:split], text[split:]
+
+        authors = []
+        student_authors = []
+        spans = []
+        for surname, given, roles in author_fields(author_text, entry):
+            name = f"{author_text[surname[0]:surname[1]]}, {author_text[given[0]:given[1]]}".strip(", ")
+            authors.append(name)
+            tag_start = tag_end = None
+            role = REGEX.search("student role", author_text[roles[0]:roles[1]])
+            if role:
+                student_authors.append(name)
+                # The tag goes with the space before it, the name is underlined in its place
+                tag_start, tag_end = roles[0] + role.start(), roles[0] + role.end()
+                if tag_start > 0 and author_text[tag_start - 1] == " ":
+                    tag_start -= 1
+                tag_start, tag_end = offset + tag_start, offset + tag_end
+            # A name without given names ends with its surname
+            name_end = given[1] if given[1] > given[0] else surname[1]
+            spans.append((offset + surname[0], offset + name_end, tag_start, tag_end))
+
+        # Title up to the first sentence end, the venue is what follows
+        rest = rest.strip(" .")
+        title, _, venue = rest.partition(". ")
+        return cls(category, body, number, tuple(authors), tuple(student_authors), year,
+                   title.strip(' "'), venue.strip(" ."), doi, tuple(spans), text_start)
+
+    def latex(self, underline_students=True, mentees=None, mark="underline", owner=None):
+        """
+        \\item line with the owner in bold, tagged students underlined (their tags
+        dropped) and the dossier numbering removed; authors whose key is in
+        `mentees` are marked as well, see MENTEE_MARKS. Built from the parsed
+        author spans, the entry text is only escaped.
+        """
+        owner = owner or DEFAULT_OWNER
+        text = self.body.strip()
+        pieces = ["\\item" if self.number is not None else "\\item "]
+        position = self.text_start
+        for name, (name_start, name_end, tag_start, tag_end) in zip(self.authors, self.spans):
+            student = underline_students and tag_start is not None
+            mentee = bool(mentees) and author_key(name) in mentees
+            is_owner = owner.is_author(name)
+            if not (student or mentee or is_owner):
+                continue
+            if student:
+                name_end = tag_start
+                record_counter("student authors underlined")
+            marked = latex_escape(text[name_start:name_end])
+            if is_owner:
+                last, _, given = marked.partition(",")
+                marked = f"\\textbf{{\\textbf{{{last},}}{given}}}"
+            # Tagged students are already underlined
+            if mentee and not (student and mark == "underline"):
+                marked = MENTEE_MARKS[mark][0].format(marked)
+            if student:
+                marked = f"\\underline{{{marked}}}"
+            pieces.append(latex_escape(text[position:name_start]))
+            pieces.append(marked)
+            position = tag_end if student else name_end
+        pieces.append(latex_escape(text[position:]))
+        if self.doi:
+            pieces.append(f" \\url{{https://doi.org/{self.doi}}}")
+        return "".join(pieces).rstrip().replace('&', '&\n')
+
+def author_key(name):
+    """
+    Normalized author key, the last name plus the first initial: "Dolack, M. E." in
+    an entry and "Dolack, M." in the student records both become ("dolack", "m").
+    """
+    last, _, given = name.partition(",")
+    initial = next((char for char in given if char.isalpha()), "")
+    return "".join(char for char in last.lower() if char.isalpha()), initial.lower()
+
+# How mentored co-authors are marked, with the note put above the publications
+MENTEE_MARKS = {
+    "underline": ("\\underline{{{0}}}", "Mentored student and postdoc co-authors are underlined."),
+    "asterisk": ("{0}\\textsuperscript{{*}}", "Mentored student and postdoc co-authors have an asterisk after their name."),
+}
 
-            # Remove numbers after \item and add to LaTeX output
-            formatted_publication = re.sub(r'^\\item\s*\d+\.', r'\\item', formatted_publication)
-            latex_output += f"  {formatted_publication}\n"
+class AuthorIndex:
+    """
+    Inverted index from author key to the positions of the publications listing
+    that author, built once per publication list so that marking, counting and
+    per-student lists are dictionary lookups.
+    """
 
-    latex_output += r"""
-\end{enumerate}
+    def __init__(self, publications):
+        self.publications = publications
+        self.postings = defaultdict(list)
+        for number, publication in enumerate(publications):
+            for key in {author_key(name) for name in publication.authors}:
+                self.postings[key].append(number)
 
-\subsubsection{Conference Proceeding}\label{conference-proceeding}
+    def lookup(self, key):
+        return [self.publications[number] for number in self.postings.get(key, ())]
 
-\begin{enumerate}
-\def\labelenumi{\arabic{enumi}.}
-"""
-    for publication in conference_publications.split("\n"):
-        if publication.strip():
-            # Clean up and format publication entry
-            publication = replace_special_characters(format_publication_entry(publication))
-            publication = underline_students(publication)  # Apply underline to student names
-            formatted_publication = publication.replace("&", r"\&")
+    def count_with(self, keys):
+        # Publications with at least one author among `keys`
+        return len({number for key in keys for number in self.postings.get(key, ())})
 
-            # Remove numbers after \item and add to LaTeX output
-            formatted_publication = re.sub(r'^\\item\s*\d+\.', r'\\item', formatted_publication)
-            latex_output += f"  {formatted_publication}\n"
+REGEX.add("shingle separators", r'[\W_]+')
 
-    latex_output += r"""
-\end{enumerate}
+MINHASH_BINS = 64
 
-\subsubsection{Book Chapters}\label{book-chapters}
+def entry_shingles(text, size=5):
+    # Character shingles of the entry with case, punctuation, spacing and dossier numbering ignored
+    number = REGEX.match("entry number", text)
+    if number:
+        text = text[number.end():]
+    text = REGEX.sub("shingle separators", " ", text.lower()).strip()
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
 
-\begin{enumerate}
-\def\labelenumi{\arabic{enumi}.}
-"""
-    for publication in book_chapters.split("\n"):
-        if publication.strip():
-            # Clean up and format publication entry
-            publication = replace_special_characters(format_publication_entry(publication))
-            publication = underline_students(publication)  # Apply underline to student names
-            formatted_publication = publication.replace("&", r"\&")
+def minhash_signature(shingles, bins=MINHASH_BINS):
+    """
+    One-permutation MinHash: each shingle is hashed once and only lowers the
+    minimum of its own bin, so a signature costs one hash per shingle instead
+    of one per shingle and permutation.
+    """
+    signature = [None] * bins
+    for shingle in shingles:
+        value = zlib.crc32(shingle.encode())
+        position, value = value % bins, value // bins
+        if signature[position] is None or value < signature[position]:
+            signature[position] = value
+
+    # Empty bins borrow the next filled bin's value (rotation densification),
+    # offset by the distance so they stay distinguishable from it
+    filled = [position for position in range(bins) if signature[position] is not None]
+    if not filled:
+        return signature
+    densified = list(signature)
+    for position in range(bins):
+        if signature[position] is None:
+            distance = 1
+            while signature[(position + distance) % bins] is None:
+                distance += 1
+            densified[position] = signature[(position + distance) % bins] + distance * (1 << 32)
+    return densified
+
+def lsh_bands(threshold, permutations=MINHASH_BINS):
+    # Bands x rows whose candidate threshold (1/bands)^(1/rows) is closest to `threshold`
+    # (slightly below it, so true pairs are rarely missed; candidates are verified exactly)
+    options = [(bands, permutations // bands) for bands in range(1, permutations + 1) if permutations % bands == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - (threshold - 0.05)))
+
+def find_near_duplicates(texts, threshold=0.8):
+    """
+    Pairs (kept, dropped, similarity) of near-duplicate texts, by index.
 
-            # Remove numbers after \item and add to LaTeX output
-            formatted_publication = re.sub(r'^\\item\s*\d+\.', r'\\item', formatted_publication)
-            latex_output += f"  {formatted_publication}\n"
+    Each text is reduced to a MinHash signature and the signatures are split into
+    LSH bands, so only texts sharing a band are ever compared; the candidates are
+    then checked with their exact shingle Jaccard similarity. The earlier text of
+    a group is kept.
+    """
+    shingles = [entry_shingles(text) for text in texts]
+    bands, rows = lsh_bands(threshold)
+
+    buckets = defaultdict(list)
+    for index, entry in enumerate(shingles):
+        signature = minhash_signature(entry)
+        for band in range(bands):
+            buckets[(band, tuple(signature[band * rows:(band + 1) * rows]))].append(index)
+
+    # Union-find over the verified pairs
+    parent = list(range(len(texts)))
+
+    def root(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    similarities = {}
+    for members in buckets.values():
+        for position, first in enumerate(members):
+            for second in members[position + 1:]:
+                if (first, second) in similarities or root(first) == root(second):
+                    continue
+                union = len(shingles[first] | shingles[second])
+                similarity = len(shingles[first] & shingles[second]) / union if union else 1.0
+                similarities[(first, second)] = similarity
+                if similarity >= threshold:
+                    first_root, second_root = root(first), root(second)
+                    parent[max(first_root, second_root)] = min(first_root, second_root)
+
+    # Every text merged into a group reports the group's first text and their similarity
+    duplicates = []
+    for index in range(len(texts)):
+        kept = root(index)
+        if kept != index:
+            similarity = similarities.get((kept, index))
+            if similarity is None:
+                union = len(shingles[kept] | shingles[index])
+                similarity = len(shingles[kept] & shingles[index]) / union if union else 1.0
+            duplicates.append((kept, index, similarity))
+    return duplicates
+
+def merge_near_duplicates(records, threshold):
+    # Drop near-duplicate records, keeping the first of each group, and report what was merged.
+    # Only records with authors take part: lines without any are continuation lines
+    # (a conference location, a page range) that legitimately repeat.
+    candidates = [index for index, record in enumerate(records) if record.authors]
+    duplicates = find_near_duplicates([records[index].body for index in candidates], threshold)
+    dropped = set()
+    for kept, index, similarity in duplicates:
+        kept, index = candidates[kept], candidates[index]
+        dropped.add(index)
+        record_counter("near-duplicates merged")
+        print(f"Near-duplicate ({similarity:.2f}) merged: [{records[index].category}] {records[index].body.strip()[:70]}")
+        print(f"    kept: [{records[kept].category}] {records[kept].body.strip()[:70]}")
+    return [record for index, record in enumerate(records) if index not in dropped]
+
+class EntryFilter:
+    """
+    Which publication and presentation entries get rendered: a year window, a set
+    of categories, near-duplicates merged and at most `max_entries` of the most
+    recent ones.
 
-    latex_output += r"""
-\end{enumerate}
+    Entries without a year are left out when a year window is set, and rank
+    last among the most recent.
+    """
 
-\subsubsection{Other}\label{other}
+    def __init__(self, first_year=None, last_year=None, categories=None, max_entries=None,
+                 near_duplicate_threshold=None):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.categories = frozenset(categories) if categories else None
+        self.max_entries = max_entries
+        self.near_duplicate_threshold = near_duplicate_threshold
+
+    def __repr__(self):
+        # Stable, so it can be part of an incremental build key
+        categories = sorted(self.categories) if self.categories else None
+        return (f"EntryFilter(first_year={self.first_year}, last_year={self.last_year}, "
+                f"categories={categories}, max_entries={self.max_entries}, "
+                f"near_duplicate_threshold={self.near_duplicate_threshold})")
+
+    def wants_category(self, category):
+        return self.categories is None or category in self.categories
+
+    def wants_year(self, year):
+        if self.first_year is None and self.last_year is None:
+            return True
+        if year is None:
+            return False
+        return (self.first_year is None or year >= self.first_year) and (self.last_year is None or year <= self.last_year)
+
+    def select(self, records):
+        # Records in the window without near-duplicates, then the most recent max_entries of them in their original order
+        records = [record for record in records if self.wants_category(record.category) and self.wants_year(record.year)]
+        if self.near_duplicate_threshold is not None:
+            records = merge_near_duplicates(records, self.near_duplicate_threshold)
+        if self.max_entries is not None and len(records) > self.max_entries:
+            newest = sorted(range(len(records)), key=lambda i: -records[i].year if records[i].year is not None else 1)
+            keep = set(newest[:self.max_entries])
+            records = [record for i, record in enumerate(records) if i in keep]
+        return records
+
+def parse_publications(word_text, entry_filter=None):
+    # Publication records of every category, in dossier order; a category the
+    # filter excludes is not even parsed
+    publications = []
+    for category, (start_marker, end_marker) in PUBLICATION_MARKERS.items():
+        if entry_filter is not None and not entry_filter.wants_category(category):
+            continue
+        for entry in extract_text_between_markers(word_text, start_marker, end_marker).split("\n"):
+            if not entry.strip():
+                continue
+            # "Other Works" lists pre-prints and technical reports under their own sub-headings
+            if category == "Other" and entry.startswith(("Pre-Print", "Technical Report")):
+                continue
+            publications.append(Publication.from_entry(entry, category))
+    if entry_filter is not None:
+        publications = entry_filter.select(publications)
+    return publications
 
-\begin{enumerate}
-\def\labelenumi{\arabic{enumi}.}
-"""
-    for publication in other_publications.split("\n"):
-        if publication.strip() and not publication.startswith(r"Pre-Print") and not publication.startswith(r"Technical Report"):
-            # Clean up and format publication entry
-            publication = replace_special_characters(format_publication_entry(publication))
-            publication = underline_students(publication)  # Apply underline to student names
-            formatted_publication = publication.replace("&", r"\&")
+# Directed-learning subsections whose students are mentees; committee memberships are not
+MENTEE_SECTIONS = ("Master's Thesis Advisor", "Ph.D. Dissertation Advisor", "Postdoctoral Mentorship Advisor",
+                   "Research Activity Advisor", "Undergraduate Honors Thesis Advisor")
 
-            # Remove numbers after \item and add to LaTeX output
-            formatted_publication = re.sub(r'^\\item\s*\d+\.', r'\\item', formatted_publication)
-            latex_output += f"  {formatted_publication}\n"
+REGEX.add("student record", r"([A-Z][^,.()]*?),\s*((?:[A-Z][a-z]?\.[\s-]*)+)")
+
+class Mentee:
+    """
+    A student or postdoc from the directed-learning records, as listed by
+    add_directed_student_learning: "Fournier, N., MS. Finite element modeling ... (dates)."
+    """
+
+    __slots__ = ("name", "key", "section", "title")
+
+    def __init__(self, name, section, title=""):
+        self.name = name
+        self.key = author_key(name)
+        self.section = section
+        self.title = title
+
+    @classmethod
+    def from_line(cls, line, section):
+        match = REGEX.match("student record", line)
+        if match is None:
+            return None
+        name = f"{match.group(1).strip()}, {match.group(2).strip()}"
+        rest = line[match.end():]
+        # Skip the degree of "Fournier, N., MS." and "Grube, R., Ph.D."
+        if rest.startswith(","):
+            rest = rest.split(". ", 1)[-1]
+        title = rest.split(" (")[0].split(". Date Graduated")[0]
+        return cls(name, section, title.strip(" ."))
+
+def parse_mentees(word_text):
+    # One record per advised student in MENTEE_SECTIONS, in dossier order
+    mentees = []
+    for start_marker, end_marker in DIRECTED_LEARNING_MARKERS:
+        if start_marker not in MENTEE_SECTIONS:
+            continue
+        for line in extract_text_between_markers(word_text, start_marker, end_marker).splitlines():
+            mentee = Mentee.from_line(line.strip(), start_marker)
+            if mentee is not None:
+                mentees.append(mentee)
+    return mentees
+
+def mentee_publications(word_text, entry_filter=None):
+    """
+    Each mentee with their co-authored publications, found through one
+    AuthorIndex over the (filtered) publications.
+    """
+    index = AuthorIndex(parse_publications(word_text, entry_filter))
+    mentees = parse_mentees(word_text)
+    return index, [(mentee, index.lookup(mentee.key)) for mentee in mentees]
+
+def extract_publications(word_text, latex_text, entry_filter=None, mark_mentees=None, owner=None):
+    # Parse every entry once, the records carry everything the rendering needs;
+    # entries left out by the filter are never formatted or escaped
+    publications = {category: [] for category in PUBLICATION_MARKERS}
+    records = parse_publications(word_text, entry_filter)
+    for publication in records:
+        publications[publication.category].append(publication)
+
+    latex_output = "\n\\subsection{PUBLICATIONS}\\label{publications}\n"
+
+    # Mentored co-authors are marked by key, joined against the directed-learning records
+    mentees = None
+    if mark_mentees:
+        mentees = {mentee.key for mentee in parse_mentees(word_text)}
+        record_counter("papers with mentees", AuthorIndex(records).count_with(mentees))
+        latex_output += f"\n\\textit{{{MENTEE_MARKS[mark_mentees][1]}}}\n"
+
+    # One enumerate per category, in PUBLICATION_MARKERS order
+    for category in PUBLICATION_MARKERS:
+        if entry_filter is not None and not entry_filter.wants_category(category):
+            continue
+        label = category.lower().replace(" ", "-")
+        latex_output += f"\n\\subsubsection{{{category}}}\\label{{{label}}}\n\n\\begin{{enumerate}}\n\\def\\labelenumi{{\\arabic{{enumi}}.}}\n"
+        for publication in publications[category]:
+            latex_output += f"  {publication.latex(mentees=mentees, mark=mark_mentees, owner=owner)}\n"
+            record_counter("entries: publications")
+        latex_output += "\n\\end{enumerate}\n"
 
-    latex_output += r"""
-\end{enumerate}
-"""
-    
     # Append the new publication section to the existing LaTeX content
-    latex_text = latex_text + latex_output
+    latex_text += latex_output
 
     # Remove the existing \end{document} if it exists
-    latex_text = latex_text.replace("\\end{document}", "").strip()
+    latex_text = remove_end_document(latex_text)
 
     latex_text += r"\vspace{1\baselineskip}"
 
@@ -1755,40 +2370,20 @@ def clean_input_text(text):
     """Remove unsupported characters from the input text."""
     return text.encode('utf-8', 'ignore').decode('utf-8')
 
-def replace_special_characters(entry):
-    replacements = {
-        'á': r"\'a",
-        'é': r"\'e",
-        'í': r"\'i",
-        'ó': r"\'o",
-        'ú': r"\'u",
-        'ñ': r"~n",
-        'ü': r"\"u",
-        'Ä': r"\"A",
-        'Ö': r"\"O",
-        'Ü': r"\"U",
-        'ä': r"\"a",
-        'ö': r"\"o",
-        'ß': r"\ss",
-        # Add more replacements as needed
-    }
-    for key, value in replacements.items():
-        entry = entry.replace(key, value)
-    return entry
-
-
+# Dossier markers around each presentation category
+PRESENTATION_MARKERS = {
+    'Demonstrations': ('Demonstrations', 'Keynotes/Plenary Addresses'),
+    'Keynotes/Plenary Addresses': ('Keynotes/Plenary Addresses', 'Oral Presentations'),
+    'Oral Presentations': ('Oral Presentations', 'Panels'),
+    'Panels': ('Panels', 'Posters'),
+    'Posters': ('Posters', 'Posters and Oral Presentations'),
+    'Posters and Oral Presentations': ('Posters and Oral Presentations', 'Seminars'),
+    'Seminars': ('Seminars', "Description of Outreach or Other Activities in which there was Significant Use of Candidate's Expertise"),
+}
 
-def extract_presentations(word_text, latex_text):
+def extract_presentations(word_text, latex_text, entry_filter=None, owner=None):
     # Define the markers for each section
-    section_markers = {
-        'Demonstrations': ('Demonstrations', 'Keynotes/Plenary Addresses'),
-        'Keynotes/Plenary Addresses': ('Keynotes/Plenary Addresses', 'Oral Presentations'),
-        'Oral Presentations': ('Oral Presentations', 'Panels'),
-        'Panels': ('Panels', 'Posters'),
-        'Posters': ('Posters', 'Posters and Oral Presentations'),
-        'Posters and Oral Presentations': ('Posters and Oral Presentations', 'Seminars'),
-        'Seminars': ('Seminars', "Description of Outreach or Other Activities in which there was Significant Use of Candidate's Expertise"),
-    }
+    section_markers = PRESENTATION_MARKERS
 
     # Dictionary to store unique entries
     unique_entries = set()
@@ -1807,18 +2402,27 @@ def extract_presentations(word_text, latex_text):
         headings = {"Oral Presentations", "Panels", "Posters", "Seminars", "Posters and Oral Presentations", "and Workshops",'Invited Keynote'}
         return bool(line.strip()) and line.strip() not in headings and "Won Best Poster Award" and ", and Workshops" not in line
 
-    # Extract text between markers for each section and add unique entries only
+    # Extract text between markers for each section and keep unique entries only
+    presentations = []
     for section, (start_marker, end_marker) in section_markers.items():
+        # The category sections overlap, an entry belongs to the first one listing it;
+        # entries of a category the filter excludes are still tracked but not parsed
+        wanted = entry_filter is None or entry_filter.wants_category(section)
         extracted_text = extract_text_between_markers(word_text, start_marker, end_marker)
         
         for entry in extracted_text.splitlines():
             entry = entry.strip()
             if is_content_line(entry) and entry not in unique_entries:  # Ensure entry is unique and skip irrelevant lines
                 unique_entries.add(entry)  # Track it to prevent future duplicates
-                formatted_entry = replace_special_characters(format_publication_entry(entry))
-                formatted_entry = formatted_entry.replace("&", r"\&")
-                formatted_entry = re.sub(r'^\\item\s*\d+\.', r'\\item', formatted_entry)  # Clean item numbering
-                latex_output += f"  {formatted_entry}\n"
+                if wanted:
+                    presentations.append(Publication.from_entry(entry, section))
+
+    # Only the entries that pass the filter are formatted
+    if entry_filter is not None:
+        presentations = entry_filter.select(presentations)
+    for presentation in presentations:
+        latex_output += f"  {presentation.latex(underline_students=False, owner=owner)}\n"
+        record_counter("entries: presentations")
 
     latex_output += r"""
 \end{enumerate}
@@ -1828,29 +2432,35 @@ def extract_presentations(word_text, latex_text):
     latex_text += latex_output
 
     # Remove existing \end{document} if it exists and add it at the end
-    latex_text = latex_text.replace("\\end{document}", "").strip()
+    latex_text = remove_end_document(latex_text)
     latex_text += r"\vspace{1\baselineskip}\n\\end{document}"
 
     return latex_text
 
-def extract_contract_project_and_grants(word_text, latex_text):
+# Dossier markers around the awarded and pending projects, the list stops at the
+# "Not Funded" heading
+GRANT_MARKERS = ('Projects, Grants, Commissions, and Contracts', 'Not Funded')
+
+# Only awarded projects are listed, the proposals from this heading on are still awaiting funding
+GRANT_PENDING_HEADING = 'Pending'
+
+# Grant lines left out for every owner, see OwnerProfile.filter_lines for the rest
+GRANT_SKIPPED_LINES = frozenset({'Co-Investigator(s):'})
+
+def extract_contract_project_and_grants(word_text, latex_text, owner=None):
     # Define markers for extracting text
-    start_marker_grants = 'Projects, Grants, Commissions, and Contracts'
-    end_marker_grants = 'Submitted for Funding: September 27, 2024'
+    start_marker_grants, end_marker_grants = GRANT_MARKERS
     extracted_text = extract_text_between_markers(word_text, start_marker_grants, end_marker_grants)
     
     # Filter out unwanted lines and ensure entries are unique
-    unwanted_lines = {
-        'Pending', 
-        'Agency: Triad National Security, LLC (was LANL - Los Alamos National Laboratory)',
-        'Principal Investigator: Kraft, Reuben H.',
-        'Co-Investigator(s):',
-        'Project Title: Elucidating high strain rate deformation mechanisms in penetration-resistant composites.',
-        'Won Best Poster Award'
-    }
-    filtered_text = "\n".join(
-        line for line in extracted_text.splitlines() if line.strip() and line not in unwanted_lines
-    )
+    unwanted_lines = GRANT_SKIPPED_LINES | (owner or DEFAULT_OWNER).filter_lines
+    awarded_lines = []
+    for line in extracted_text.splitlines():
+        if line.strip() == GRANT_PENDING_HEADING:
+            break
+        if line.strip() and line not in unwanted_lines:
+            awarded_lines.append(line)
+    filtered_text = "\n".join(awarded_lines)
 
     # Prepare the LaTeX formatted output for the required section
     latex_output = r"""
@@ -1868,16 +2478,18 @@ def extract_contract_project_and_grants(word_text, latex_text):
                 latex_output += "\\\\[12pt]\n"  # Add space before new agency section
             
             current_agency = line
-            latex_output += f"{current_agency}\\\\\n"
+            latex_output += f"{latex_escape(current_agency)}\\\\\n"
+            record_counter("entries: grants")
             seen_lines.add(line)
         
         elif line.startswith("Principal Investigator:") or line.startswith("Co-Investigator(s):") or line.startswith("Project Title:") or line.startswith("Amendments:") or "OSP Number" in line:
             if line not in seen_lines:
-                latex_output += f"{line}\\\\\n"
+                latex_output += f"{latex_escape(line)}\\\\\n"
+                record_counter("entries: grants")
                 seen_lines.add(line)
 
     # Finalize LaTeX document
-    latex_text = latex_text.replace("\\end{document}", "").strip()
+    latex_text = remove_end_document(latex_text)
     latex_text += latex_output
     latex_text += "\n\\end{document}"
 
@@ -1889,18 +2501,18 @@ def extract_contract_project_and_grants(word_text, latex_text):
 
 
 
-def process_student_thesis_titles(text,dossier_file_path): 
+def process_student_thesis_titles(text, dossier): 
     # Extract master's thesis titles
-    masters_data = extract_student_titles(dossier_file_path)
+    masters_data = extract_student_titles(dossier)
  
     # Extract PhD dissertation titles
-    phd_data = extract_phd_titles(dossier_file_path)
+    phd_data = extract_phd_titles(dossier)
   
     # Extract postdoc titles
-    postdoc_data = extract_postdoc_titles(dossier_file_path)
+    postdoc_data = extract_postdoc_titles(dossier)
     
     # Extract undergrad thesis titles
-    undergrad_data = extract_undergrad_student_titles(dossier_file_path)
+    undergrad_data = extract_undergrad_student_titles(dossier)
      
     # Merge the dictionaries
     student_data = {**masters_data, **phd_data, **postdoc_data, **undergrad_data}
@@ -1926,12 +2538,9 @@ def process_student_thesis_titles(text,dossier_file_path):
     return text
 
 def replace_problematic_characters_in_titles(student_data):
-    problematic_char = u'\u2013'  # En dash (U+2013)
-
+    # En dashes, accents and LaTeX specials in the titles
     for name, title in student_data.items():
-        if problematic_char in title:
-            #print(f"Found character '{problematic_char}' in {name}: {title}")
-            student_data[name] = title.replace(problematic_char, '--')
+        student_data[name] = latex_escape(title)
 
     return student_data
 
@@ -2044,16 +2653,9 @@ def update_masters_section(text_data):
     updated_text_data = text_data.replace(section_content, formatted_section_content)
     
     return updated_text_data
-def extract_student_titles(file_path):
-    #file_path = r"C:\Users\rhk12\OneDrive - The Pennsylvania State University\resume\CV\20231021-095357-CDT.docx"
-    
-    # Check if the file exists
-    if not os.path.exists(file_path):
-        return f"File not found at '{file_path}'"
-    
-    # If the file exists, proceed to read its content
-    doc = Document(file_path)
-    full_text = [para.text for para in doc.paragraphs]
+def extract_student_titles(dossier):
+    # Use the paragraphs of the already parsed dossier
+    full_text = dossier.paragraphs
 
     # Define the sub-section titles
     sub_section_titles = ["Master's Thesis Advisor", "Master\u2019s Thesis Advisor"]
@@ -2062,7 +2664,7 @@ def extract_student_titles(file_path):
     # Find the start of the sub-section
     start_index = None
     for title in sub_section_titles:
-        start_index = next((i for i, text in enumerate(full_text) if title in text), None)
+        start_index = dossier.find_paragraph(title)
         if start_index is not None:
             break
 
@@ -2073,14 +2675,12 @@ def extract_student_titles(file_path):
     # Find the end of the sub-section
     end_index = None
     for title in end_section_titles:
-        end_index = next((i for i, text in enumerate(full_text[start_index:]) if title in text), None)
+        end_index = dossier.find_paragraph(title, start_index)
         if end_index is not None:
             break
 
     if end_index is None:
         end_index = len(full_text)
-    else:
-        end_index += start_index
 
     # Extract student names and thesis titles
     student_data = {}
@@ -2113,32 +2713,23 @@ def add_undergrad_titles(text, undergrad_data):
     
     return text
 
-def extract_postdoc_titles(file_path):
-    #file_path = r"C:\Users\rhk12\OneDrive - The Pennsylvania State University\resume\CV\20231021-095357-CDT.docx"
-    
-    # Check if the file exists
-    if not os.path.exists(file_path):
-        return f"File not found at '{file_path}'"
-    
-    # If the file exists, proceed to read its content
-    doc = Document(file_path)
-    full_text = [para.text for para in doc.paragraphs]
+def extract_postdoc_titles(dossier):
+    # Use the paragraphs of the already parsed dossier
+    full_text = dossier.paragraphs
 
     # Define the sub-section titles
     sub_section_title = "Postdoctoral Mentorship Advisor"
     end_section_title = "Research Activity Advisor"
 
     # Find the start of the sub-section
-    start_index = next((i for i, text in enumerate(full_text) if sub_section_title in text), None)
+    start_index = dossier.find_paragraph(sub_section_title)
     if start_index is None:
         return {}
 
     # Find the end of the sub-section
-    end_index = next((i for i, text in enumerate(full_text[start_index:]) if end_section_title in text), None)
+    end_index = dossier.find_paragraph(end_section_title, start_index)
     if end_index is None:
         end_index = len(full_text)
-    else:
-        end_index += start_index
 
     # Extract postdoc names and work titles
     postdoc_data = {}
@@ -2150,33 +2741,24 @@ def extract_postdoc_titles(file_path):
 
     return postdoc_data
 
-def extract_phd_titles(file_path):
-    #file_path = r"C:\Users\rhk12\OneDrive - The Pennsylvania State University\resume\CV\20231021-095357-CDT.docx"
-    
-    # Check if the file exists
-    if not os.path.exists(file_path):
-        return f"File not found at '{file_path}'"
-    
-    # If the file exists, proceed to read its content
-    doc = Document(file_path)
-    full_text = [para.text for para in doc.paragraphs]
+def extract_phd_titles(dossier):
+    # Use the paragraphs of the already parsed dossier
+    full_text = dossier.paragraphs
 
     # Define the sub-section titles
     sub_section_title = "Ph.D. Dissertation Advisor"
     end_section_title = "Ph.D. Dissertation Committee Member"  # This is the section that follows the Advisor section
 
     # Find the start of the sub-section
-    start_index = next((i for i, text in enumerate(full_text) if sub_section_title in text), None)
+    start_index = dossier.find_paragraph(sub_section_title)
     if start_index is None:
         print(f"Section '{sub_section_title}' not found")
         return {}
 
     # Find the end of the sub-section
-    end_index = next((i for i, text in enumerate(full_text[start_index + 1:]) if end_section_title in text), None)
+    end_index = dossier.find_paragraph(end_section_title, start_index + 1)
     if end_index is None:
         end_index = len(full_text)
-    else:
-        end_index += start_index + 1
 
     # Extract student names and dissertation titles
     student_data = {}
@@ -2199,7 +2781,11 @@ def convert_table_to_latex(table):
 
 import re
 
-def add_professional_positions_to_latex(latex_text, tables_list, header_to_search):
+REGEX.add("position dates", r'(?:\w+\s)?\d{4}')
+
+def add_professional_positions_to_latex(latex_text, tables_list, owner=None):
+    owner = owner or DEFAULT_OWNER
+
     def format_professional_positions(table):
         formatted_positions = {
             "Academic": [],
@@ -2216,7 +2802,7 @@ def add_professional_positions_to_latex(latex_text, tables_list, header_to_searc
             dates = row[3].strip()
             
             # Extract months and years from the dates
-            date_range = re.findall(r'(?:\w+\s)?\d{4}', dates)
+            date_range = REGEX.findall("position dates", dates)
             if len(date_range) == 2:
                 formatted_dates = f"({date_range[0]} - {date_range[1]})"
             elif len(date_range) == 1:
@@ -2225,7 +2811,7 @@ def add_professional_positions_to_latex(latex_text, tables_list, header_to_searc
                 formatted_dates = ""
 
             # Construct the full position line with the desired format
-            position_line = f"{rank_or_title}, {employer}. {formatted_dates}. \\\\ \n"
+            position_line = f"{latex_escape(rank_or_title)}, {latex_escape(employer)}. {formatted_dates}. \\\\ \n"
 
             # Classify positions based on keywords
             if "Assistant Professor" in rank_or_title or "Professor" in rank_or_title:
@@ -2241,13 +2827,12 @@ def add_professional_positions_to_latex(latex_text, tables_list, header_to_searc
         # Checks if the table has a header that matches the "Exact Rank and Title" table
         if len(table) > 1 and "Exact Rank and Title of Position" in table[0]:
             for row in table:
-                if len(row) >= 3 and "Professor of Mechanical Engineering" in row[2]:
-                    formatted_title = "Professor of Mechanical Engineering. (July 2024 - Present)."
-                    return formatted_title
+                if len(row) >= 3 and owner.title in row[2]:
+                    return latex_escape(owner.current_title())
         return None
 
     # Remove \end{document} if it exists
-    latex_text = latex_text.replace("\\end{document}", "").strip()
+    latex_text = remove_end_document(latex_text)
     flag = True
     for table in tables_list:
         # Extract and add the current position if available
@@ -2262,6 +2847,7 @@ def add_professional_positions_to_latex(latex_text, tables_list, header_to_searc
             
             # Convert and append the formatted professional positions
             positions = format_professional_positions(table)
+            record_counter("entries: professional positions", sum(len(entries) for entries in positions.values()))
             
             # Add Academic subsubsection
             if positions["Academic"]:
@@ -2319,9 +2905,246 @@ def read_word_document(file_path):
             row_text = [unidecode.unidecode(cell.text.strip()) for cell in row.cells]
             table_rows.append(row_text)
         table_data.append(table_rows)  # Store the entire table
-    
+
+    return '\n'.join(full_text), table_data
+
+# WordprocessingML tag names used by the streaming reader
+W_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY = W_NAMESPACE + "body"
+W_P = W_NAMESPACE + "p"
+W_R = W_NAMESPACE + "r"
+W_T = W_NAMESPACE + "t"
+W_HYPERLINK = W_NAMESPACE + "hyperlink"
+W_TBL = W_NAMESPACE + "tbl"
+W_TR = W_NAMESPACE + "tr"
+W_TC = W_NAMESPACE + "tc"
+W_VAL = W_NAMESPACE + "val"
+W_TYPE = W_NAMESPACE + "type"
+
+# Text equivalents of the empty run elements (same mapping python-docx uses)
+RUN_ELEMENT_TEXT = {
+    W_NAMESPACE + "tab": "\t",
+    W_NAMESPACE + "ptab": "\t",
+    W_NAMESPACE + "cr": "\n",
+    W_NAMESPACE + "noBreakHyphen": "-",
+}
+
+def run_text(run):
+    # Only direct children of the run carry text, exactly like Run.text
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_NAMESPACE + "br":
+            # Only text-wrapping breaks produce a newline, page/column breaks are dropped
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in RUN_ELEMENT_TEXT:
+            parts.append(RUN_ELEMENT_TEXT[tag])
+    return "".join(parts)
+
+def paragraph_text(paragraph):
+    # Runs and hyperlinks directly under the paragraph, like Paragraph.text
+    parts = []
+    for child in paragraph:
+        if child.tag == W_R:
+            parts.append(run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(run_text(run) for run in child if run.tag == W_R)
+    return "".join(parts)
+
+def table_rows_text(table):
+    # Rebuild row.cells the way python-docx does: a cell spanning several grid columns
+    # is repeated once per column, and a vertically merged cell repeats the cell above it
+    rows = []
+    cells_above = {}
+    for row in table:
+        if row.tag != W_TR:
+            continue
+        grid_offset = 0
+        trPr = row.find(W_NAMESPACE + "trPr")
+        if trPr is not None:
+            grid_before = trPr.find(W_NAMESPACE + "gridBefore")
+            if grid_before is not None:
+                grid_offset = int(grid_before.get(W_VAL, "0"))
+
+        row_text = []
+        row_cells = {}
+        for cell in row:
+            if cell.tag != W_TC:
+                continue
+            grid_span = 1
+            vmerge = None
+            tcPr = cell.find(W_NAMESPACE + "tcPr")
+            if tcPr is not None:
+                span = tcPr.find(W_NAMESPACE + "gridSpan")
+                if span is not None:
+                    grid_span = int(span.get(W_VAL, "1"))
+                merge = tcPr.find(W_NAMESPACE + "vMerge")
+                if merge is not None:
+                    vmerge = merge.get(W_VAL, "continue")
+
+            if vmerge == "continue" and grid_offset in cells_above:
+                text, grid_span = cells_above[grid_offset]
+            else:
+                text = "\n".join(paragraph_text(p) for p in cell if p.tag == W_P)
+
+            row_cells[grid_offset] = (text, grid_span)
+            row_text.extend([text] * grid_span)
+            grid_offset += grid_span
+
+        cells_above = row_cells
+        rows.append(row_text)
+    return rows
+
+def iter_word_document_blocks(file_path):
+    """
+    Stream the body of a .docx file and yield ("paragraph", text) and ("table", rows)
+    in document order, clearing each block once it has been read.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        try:
+            xml_file = archive.open("word/document.xml")
+        except KeyError:
+            # A zip, but not a Word document
+            raise zipfile.BadZipFile("No word/document.xml in the archive, not a .docx file") from None
+        with xml_file:
+            depth = 0
+            body = None
+            for event, element in ET.iterparse(xml_file, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if element.tag == W_BODY:
+                        body = element
+                    continue
+
+                depth -= 1
+                # Only top-level blocks (document/body/block) are read, nested tables are
+                # part of their cell and are not listed on their own, like doc.tables
+                if body is None or depth != 2:
+                    continue
+                if element.tag == W_P:
+                    yield "paragraph", paragraph_text(element)
+                elif element.tag == W_TBL:
+                    yield "table", table_rows_text(element)
+                body.remove(element)
+
+def read_word_document_streaming(file_path):
+    # Same (word_text, table_data) contract as read_word_document without building python-docx objects
+    full_text = []
+    table_data = []
+
+    for kind, content in iter_word_document_blocks(file_path):
+        if kind == "paragraph":
+            full_text.append(unidecode.unidecode(content))
+        else:
+            table_data.append([[unidecode.unidecode(cell.strip()) for cell in row] for row in content])
+
     return '\n'.join(full_text), table_data
 
+class ParsedDossier:
+    """
+    A dossier parsed once and shared by every extractor.
+
+    `paragraphs` keeps the original paragraph text (the title extractors match on
+    characters such as the curly apostrophe), while `text` and `tables` are the
+    unidecoded values that read_word_document returns.
+    """
+
+    def __init__(self, file_path, paragraphs, tables, text=None):
+        self.file_path = file_path
+        self.paragraphs = paragraphs
+        self.tables = tables
+        if text is None:
+            text = '\n'.join(unidecode.unidecode(para) for para in paragraphs)
+        self.text = text
+        self._section_offsets = {}
+
+    def section_offsets(self, title):
+        # Indices of every paragraph containing `title`, computed once per title
+        offsets = self._section_offsets.get(title)
+        if offsets is None:
+            offsets = [i for i, para in enumerate(self.paragraphs) if title in para]
+            self._section_offsets[title] = offsets
+        return offsets
+
+    @property
+    def sections(self):
+        # Marker index over the dossier text, see SectionIndex
+        return get_section_index(self.text)
+
+    def find_paragraph(self, title, start=0):
+        # Index of the first paragraph at or after `start` containing `title`, or None
+        for index in self.section_offsets(title):
+            if index >= start:
+                return index
+        return None
+
+def parse_dossier(file_path, source=None):
+    paragraphs = []
+    tables = []
+
+    for kind, content in iter_word_document_blocks(source or file_path):
+        if kind == "paragraph":
+            paragraphs.append(content)
+        else:
+            tables.append([[unidecode.unidecode(cell.strip()) for cell in row] for row in content])
+
+    record_counter("paragraphs parsed", len(paragraphs))
+    record_counter("tables parsed", len(tables))
+    return ParsedDossier(file_path, paragraphs, tables)
+
+# Bump whenever the reader or ParsedDossier changes so stale cache entries are ignored
+DOSSIER_PARSER_VERSION = 1
+DOSSIER_CACHE_DIR = ".cv_cache"
+
+def dossier_cache_key(docx_bytes):
+    # Content hash of the docx plus everything that changes the parsed result or its encoding
+    digest = hashlib.sha256()
+    digest.update(f"parser-{DOSSIER_PARSER_VERSION}-marshal-{marshal.version}\n".encode())
+    digest.update(docx_bytes)
+    return digest.hexdigest()
+
+def load_dossier(file_path, cache_dir=DOSSIER_CACHE_DIR):
+    """
+    Parse the dossier, or load it from the on-disk cache when the same docx bytes
+    were parsed before. Pass cache_dir=None to always parse. `file_path` may also
+    be the docx bytes themselves.
+    """
+    if isinstance(file_path, (bytes, bytearray)):
+        docx_bytes, file_path = bytes(file_path), "<docx bytes>"
+        if cache_dir is None:
+            return parse_dossier(file_path, io.BytesIO(docx_bytes))
+    elif cache_dir is None:
+        return parse_dossier(file_path)
+    else:
+        with open(file_path, 'rb') as file:
+            docx_bytes = file.read()
+    cache_path = os.path.join(cache_dir, dossier_cache_key(docx_bytes) + ".marshal")
+
+    # Cache hit: no zip, XML or unidecode work at all
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as file:
+                paragraphs, text, tables = marshal.load(file)
+            record_counter("dossier cache hits")
+            record_counter("paragraphs loaded", len(paragraphs))
+            return ParsedDossier(file_path, paragraphs, tables, text)
+        except (EOFError, ValueError, TypeError):
+            print(f"Ignoring unreadable dossier cache entry {cache_path}")
+
+    dossier = parse_dossier(file_path, io.BytesIO(docx_bytes))
+
+    # Write to a temporary file first so an interrupted run never leaves a partial entry
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        marshal.dump((dossier.paragraphs, dossier.text, dossier.tables), file)
+    os.replace(temp_path, cache_path)
+
+    return dossier
+
 # #here is the function to extract proffession_position
 # def add_professional_positions_to_latex(latex_text, tables_list, header_to_search):
 #     def format_professional_positions(table):
@@ -2405,6 +3228,8 @@ def read_word_document(file_path):
 #     return latex_text
 
 
+REGEX.add("education dates", r'\b(?:\w+\s)?\d{4}\b')
+
 def add_education_section(latex_text, tables, column_name):
     # Check for the header in each table
     for table in tables:
@@ -2414,7 +3239,7 @@ def add_education_section(latex_text, tables, column_name):
         # Check if the column name exists in the headers
         if column_name in headers:
             # Remove the existing \end{document} if it exists
-            latex_text = latex_text.replace("\\end{document}", "").strip()
+            latex_text = remove_end_document(latex_text)
             
             # Find the index of the institution, major, and date columns
             institution_index = headers.index('Name and City/State of Institution')
@@ -2433,7 +3258,7 @@ def add_education_section(latex_text, tables, column_name):
                 dates = row[date_index].split(',')[-1].strip()  # Extracting the date part
 
                 # Extract months and years from the dates
-                date_range = re.findall(r'\b(?:\w+\s)?\d{4}\b', dates)  # Capture full year range
+                date_range = REGEX.findall("education dates", dates)  # Capture full year range
                 formatted_date = ""
                 if len(date_range) == 2:
                     formatted_date = f"{date_range[0]} - {date_range[1]}"
@@ -2441,38 +3266,44 @@ def add_education_section(latex_text, tables, column_name):
                     formatted_date = f"{date_range[0]}"
 
                 # Format: Degree, Institution, Location, Date in one line, Major in the next
-                education_section += f'{degree}, {institution}, {formatted_date} \\\\ \n'
-                education_section += f'Major: {major} \\\\[0.2cm]\n'
+                education_section += f'{latex_escape(degree)}, {latex_escape(institution)}, {formatted_date} \\\\ \n'
+                education_section += f'Major: {latex_escape(major)} \\\\[0.2cm]\n'
+                record_counter("entries: education")
             
             # Add the education section to the LaTeX text
             latex_text += education_section
             
             # Append the end of the LaTeX document only if it's not already there
-            if "\\end{document}" not in latex_text:
+            if not has_end_document(latex_text):
                 latex_text += "\n\\end{document}"
 
     return latex_text
 
 
+REGEX.add("award year", r'\((\d{4})\)')
+REGEX.add("award year range", r'\((\d{4})\s*-\s*(\d{4})\)')
+REGEX.add("award month year", r'\(\w+\s+(\d{4})\)')
+REGEX.add("award date suffix", r'\((\w+\s+\d{4})\)\.|\((\d{4})\)\.|\((\d{4})\s*-\s*(\d{4})\)\.')
+
 def format_award_entry(entry):
     # Remove unnecessary newlines and extract the first sentence (main award title and date)
     entry_lines = entry.split("\n")
     first_line = entry_lines[0].strip()  # Only take the first line for each award
 
     # Regex to match different date formats
-    year_match = re.search(r'\((\d{4})\)', first_line)  # Match single year in parentheses (e.g., (2019))
+    year_match = REGEX.search("award year", first_line)  # Match single year in parentheses (e.g., (2019))
     
     if not year_match:
-        range_match = re.search(r'\((\d{4})\s*-\s*(\d{4})\)', first_line)  # Match year range (e.g., (2013 - 2016))
+        range_match = REGEX.search("award year range", first_line)  # Match year range (e.g., (2013 - 2016))
         if range_match:
             year_match = range_match.group(2)  # Extract only the ending year of the range
         else:
-            month_year_match = re.search(r'\(\w+\s+(\d{4})\)', first_line)  # Match month and year (e.g., (August 2023))
+            month_year_match = REGEX.search("award month year", first_line)  # Match month and year (e.g., (August 2023))
             if month_year_match:
                 year_match = month_year_match.group(1)  # Extract only the year part (2023)
 
     year = year_match if isinstance(year_match, str) else year_match.group(1) if year_match else ""  # Get the matched year or ending year
-    first_line = re.sub(r'\((\w+\s+\d{4})\)\.|\((\d{4})\)\.|\((\d{4})\s*-\s*(\d{4})\)\.', '', first_line)  # Remove the date or range from the main text
+    first_line = REGEX.sub("award date suffix", '', first_line)  # Remove the date or range from the main text
     
     return (first_line.strip(), year)
 
@@ -2488,24 +3319,30 @@ def extract_awards(document_text):
     
     return formatted_awards
 
+# Dossier markers around each group of awards
+AWARD_MARKERS = [
+    ("Honors or Awards for Excellence in Teaching and Advising\n\nTeaching",
+     "Supervision of, and Membership on,"),
+    ("Honors or Awards for Scholarship, Research, or Creative Activities\n\nScholarship/Research",
+     "Technology Transferred or Adapted in the Field"),
+    ("Honors or Awards for Leadership and/or Service to the University, Community, or the Profession\n\nLeadership",
+     "Service, Professional"),
+    ("Service, Professional\n\n",
+     "EXTERNAL LETTERS OF ASSESSMENT"),
+]
+
+REGEX.add("award year break", r"(\(\d{4}(?: - \d{4})?\))(\.?)(?!\n)")
+REGEX.add("award month year break", r"(\(\w+ \d{4}\))(\.?)(?!\n)")
+
 def add_awards_and_honors(latex_text, document_text):
     # Remove the existing \end{document} if it exists
-    latex_text = latex_text.replace("\\end{document}", "").strip()
+    latex_text = remove_end_document(latex_text)
 
     # Initialize the awards and honors section
     awards_section = "\\subsection*{AWARDS AND HONORS}\n\n"
 
     # Define markers to extract relevant sections from the document
-    markers = [
-        ("Honors or Awards for Excellence in Teaching and Advising\n\nTeaching",
-         "Supervision of, and Membership on,"),
-        ("Honors or Awards for Scholarship, Research, or Creative Activities\n\nScholarship/Research",
-         "Technology Transferred or Adapted in the Field"),
-        ("Honors or Awards for Leadership and/or Service to the University, Community, or the Profession\n\nLeadership",
-         "Service, Professional"),
-        ("Service, Professional\n\n",
-         "EXTERNAL LETTERS OF ASSESSMENT"),
-    ]
+    markers = AWARD_MARKERS
 
     # Extract and combine all relevant text
     relevant_text = ""
@@ -2519,15 +3356,16 @@ def add_awards_and_honors(latex_text, document_text):
     for award in awards:
         # Clean up double periods and ensure consistent formatting
         award = award.replace("..", ".").strip()
-        award = award.lstrip(',').strip()
+        award = latex_escape(award.lstrip(',').strip())
 
         # Add a line break after the date using regex
         # Handles both year and month-year patterns, inserting a LaTeX line break
-        award = re.sub(r"(\(\d{4}(?: - \d{4})?\))(\.?)(?!\n)", r"\1.\n\\", award)  # Handles (2018), (2013 - 2016)
-        award = re.sub(r"(\(\w+ \d{4}\))(\.?)(?!\n)", r"\1.\n\\", award)  # Handles (August 2023), (October 2023)
+        award = REGEX.sub("award year break", r"\1.\n\\", award)  # Handles (2018), (2013 - 2016)
+        award = REGEX.sub("award month year break", r"\1.\n\\", award)  # Handles (August 2023), (October 2023)
 
         # Add a line break between different awards
         awards_section += f"{award}"
+        record_counter("entries: awards")
 
     # Remove excessive line breaks and extra spaces
     awards_section = "\n\n".join(line for line in awards_section.splitlines() if line.strip())
@@ -2541,9 +3379,11 @@ def add_awards_and_honors(latex_text, document_text):
     return latex_text
 
 
+REGEX.add("award trailing date", r'\(([^)]+)\)$')
+
 def format_award_entry(award_text):
     # Extract the date from the end of the entry
-    match = re.search(r'\(([^)]+)\)$', award_text)
+    match = REGEX.search("award trailing date", award_text)
     if match:
         award_date = match.group(1).strip()
         award_title = award_text[:match.start()].strip()
@@ -2555,18 +3395,21 @@ def format_award_entry(award_text):
 
 
 
+IMPACT_MARKERS = ('Impact in Society of Research Scholarship and Creative Accomplishment',
+                  'Record of Membership in Professional and Learned Societies')
+
 def add_impact_in_society(word_document, latex_text):
-    start_marker = 'Impact in Society of Research Scholarship and Creative Accomplishment'
-    end_marker = 'Record of Membership in Professional and Learned Societies'
+    start_marker, end_marker = IMPACT_MARKERS
     
     # Extract the text between the specified markers
     text = extract_text_between_markers(word_document, start_marker, end_marker)
     
     # Clean and format the extracted text for LaTeX
     if text:
-        latex_text = latex_text.replace("\\end{document}", "").strip()
-        formatted_text = text.replace("&", r"\&").replace("%", r"\%").replace("#", r"\#")  # Escape LaTeX special characters
+        latex_text = remove_end_document(latex_text)
+        formatted_text = latex_escape(text)  # Escape LaTeX special characters
         formatted_text = formatted_text.strip()  # Remove any leading/trailing whitespace
+        record_counter("entries: impact in society")
 
         # Add a new subsection to the LaTeX document
         latex_text += r"""
@@ -2580,14 +3423,16 @@ def add_impact_in_society(word_document, latex_text):
     return latex_text
 
 
+SERVICE_TO_UNI_MARKERS = ('Record of Committee Work at Department, Division, School, Campus, College, and University Levels',
+                          'Service to Society as a Representative of the University')
+
 def add_service_to_uni(word_text, latex_text):
-    start_marker = 'Record of Committee Work at Department, Division, School, Campus, College, and University Levels'
-    end_marker = 'Service to Society as a Representative of the University'
+    start_marker, end_marker = SERVICE_TO_UNI_MARKERS
     text = extract_text_between_markers(word_text, start_marker, end_marker)
 
     if text:
         # Prepare LaTeX formatted text
-        latex_formatted_text = latex_text.replace("\\end{document}", "").strip()
+        latex_formatted_text = remove_end_document(latex_text)
         latex_formatted_text += "\n\\section*{Service to the University}\n\n"
         
         # Define headings and their subheadings
@@ -2628,39 +3473,46 @@ def add_service_to_uni(word_text, latex_text):
                 if current_subheading != 'Committee Work':  # Add the Committee Work subheading only once under the current heading
                     current_subheading = 'Committee Work'
                     latex_formatted_text += "\\hspace{1cm}\\subsubsection*{Committee Work}\n\n"
-                latex_formatted_text += line + "\n\n"
+                latex_formatted_text += latex_escape(line) + "\n\n"
+                record_counter("entries: service")
             elif 'Research' in line and current_heading == 'Department':
                 if current_subheading != 'Academic Leadership and Support Work':  # Add Academic Leadership and Support Work under Department
                     current_subheading = 'Academic Leadership and Support Work'
                     latex_formatted_text += "\\hspace{1cm}\\subsubsection*{Academic Leadership and Support Work}\n\n"
-                latex_formatted_text += line + "\n\n"
+                latex_formatted_text += latex_escape(line) + "\n\n"
+                record_counter("entries: service")
             elif 'Development' in line and current_heading == 'University':
                 if current_subheading != 'Participation in Development/Fundraising Activities':
                     current_subheading = 'Participation in Development/Fundraising Activities'
                     latex_formatted_text += "\\hspace{1cm}\\subsubsection*{Participation in Development/Fundraising Activities}\n\n"
-                latex_formatted_text += line + "\n\n"
+                latex_formatted_text += latex_escape(line) + "\n\n"
+                record_counter("entries: service")
             elif line:  # Any non-empty line not caught by previous conditions
-                latex_formatted_text += line + "\n\n"
+                latex_formatted_text += latex_escape(line) + "\n\n"
+                record_counter("entries: service")
 
         # Add the formatted text to the LaTeX text and end the document
-        latex_text = latex_formatted_text + "\n\\end{document}"
+        latex_formatted_text += "\n\\end{document}"
+        latex_text = latex_formatted_text
         
     return latex_text
 
 ####################################################################################################
 
 
+SERVICE_TO_SOCIETY_MARKERS = ('Judged Posters for Undergraduate Exhibition\n\nService to Society as a Representative of the University',
+                              'Service to the Disciplines and to the Profession')
+
 def add_service_to_society_as_rep_of_uni(word_text, latex_text):
     # Define specific markers for extraction
-    start_marker = 'Judged Posters for Undergraduate Exhibition\n\nService to Society as a Representative of the University'
-    end_marker = 'Service to the Disciplines and to the Profession'
+    start_marker, end_marker = SERVICE_TO_SOCIETY_MARKERS
     
     # Extract the text between the markers
     text = extract_text_between_markers(word_text, start_marker, end_marker)
 
     if text:
         # Prepare LaTeX formatted text
-        latex_formatted_text = latex_text.replace("\\end{document}", "").strip()
+        latex_formatted_text = remove_end_document(latex_text)
         latex_formatted_text += "\n\\section*{Service to Society as a Representative of the University}\n\n"
         
         # Split text into lines for processing
@@ -2680,25 +3532,29 @@ def add_service_to_society_as_rep_of_uni(word_text, latex_text):
                 
             # Format each entry under subheading or directly
             elif line:
-                latex_formatted_text += "\\hspace{1cm}" + line + "\n\n"
+                latex_formatted_text += "\\hspace{1cm}" + latex_escape(line) + "\n\n"
+                record_counter("entries: service")
         
         # Finalize the LaTeX text
-        latex_text = latex_formatted_text + "\n\\end{document}"
+        latex_formatted_text += "\n\\end{document}"
+        latex_text = latex_formatted_text
 
     return latex_text
 
 
+SERVICE_TO_DISCIPLINE_MARKERS = ('Service to the Disciplines and to the Profession',
+                                 'Honors or Awards for Leadership and/or Service to the University, Community, or the Profession')
+
 def add_service_to_discipline_and_to_the_profession(word_text, latex_text):
     # Define specific markers for extraction
-    start_marker = 'Service to the Disciplines and to the Profession'
-    end_marker = 'Co-Organizer and Co-Chairperson, 2014 Mid-Atlantic Section (M-AS) of the American Physical Society (APS), Co-Organizer. (January 2014 - October 2014).'
+    start_marker, end_marker = SERVICE_TO_DISCIPLINE_MARKERS
     
-    # Extract the text between markers including the end marker
-    text = extract_text_up_to_end_marker(word_text, start_marker, end_marker)
+    # Extract the text up to the next dossier heading
+    text = extract_text_between_markers(word_text, start_marker, end_marker)
 
     if text:
         # Prepare LaTeX formatted text
-        latex_formatted_text = latex_text.replace("\\end{document}", "").strip()
+        latex_formatted_text = remove_end_document(latex_text)
         latex_formatted_text += "\n\\section*{Service to the Disciplines and to the Profession}\n\n"
         
         # Split text into lines for processing
@@ -2711,29 +3567,34 @@ def add_service_to_discipline_and_to_the_profession(word_text, latex_text):
             # Check for subheadings and add to LaTeX with smaller size
             if 'Organizing Conferences and Service on Conference Committees' in line:
                 current_subheading = line
-                latex_formatted_text += f"\\subsubsection*{{{line}}}\n\n"
+                latex_formatted_text += f"\\subsubsection*{{{latex_escape(line)}}}\n\n"
             
             # Skip the duplicated section heading if it appears in the extracted content
             elif line != 'Service to the Disciplines and to the Profession' and line:  # Non-empty lines are added
-                latex_formatted_text += "\\hspace{1cm}" + line + "\n\n"
+                latex_formatted_text += "\\hspace{1cm}" + latex_escape(line) + "\n\n"
+                record_counter("entries: service")
         
         # Finalize the LaTeX text
-        latex_text = latex_formatted_text + "\n\\end{document}"
+        latex_formatted_text += "\n\\end{document}"
+        latex_text = latex_formatted_text
 
     return latex_text
 
+# Dossier markers for each directed-learning subsection, the start marker is also its LaTeX subheading
+DIRECTED_LEARNING_MARKERS = [
+    ("Master's Thesis Advisor", "Master's Thesis Committee Member"),
+    ("Master's Thesis Committee Member", "Ph.D. Dissertation Advisor"),
+    ("Ph.D. Dissertation Advisor", "Ph.D. Dissertation Committee Member"),
+    ("Ph.D. Dissertation Committee Member", "Postdoctoral Mentorship Advisor"),
+    ("Postdoctoral Mentorship Advisor", "Research Activity Advisor"),
+    ("Research Activity Advisor", "Undergraduate Honors Thesis Advisor"),
+    # The last subsection runs up to the dossier's next part
+    ("Undergraduate Honors Thesis Advisor", "THE SCHOLARSHIP OF Research and")
+]
+
 def add_directed_student_learning(word_text, latex_text):
     # Define the markers and their corresponding LaTeX subheadings
-    sections = [
-        ("Master's Thesis Advisor", "Master's Thesis Committee Member"),
-        ("Master's Thesis Committee Member", "Ph.D. Dissertation Advisor"),
-        ("Ph.D. Dissertation Advisor", "Ph.D. Dissertation Committee Member"),
-        ("Ph.D. Dissertation Committee Member", "Postdoctoral Mentorship Advisor"),
-        ("Postdoctoral Mentorship Advisor", "Research Activity Advisor"),
-        ("Research Activity Advisor", "Undergraduate Honors Thesis Advisor"),
-        ("Undergraduate Honors Thesis Advisor", 
-         "Robinson, M., Undergraduate. The development of an anatomically correct model of calcaneus fracture and")
-    ]
+    sections = DIRECTED_LEARNING_MARKERS
     
     # LaTeX section title
     directed_learning_section = "\\subsection*{DIRECTED STUDENT LEARNING}\n\n"
@@ -2753,18 +3614,20 @@ def add_directed_student_learning(word_text, latex_text):
             if not line:
                 continue  # Skip empty lines
             
+            record_counter("entries: directed student learning")
+
             # Add a double newline after lines with "Date Graduated" for better readability
             if "Date Graduated:" in line:
-                directed_learning_section += f"{line}\n\n"
+                directed_learning_section += f"{latex_escape(line)}\n\n"
             else:
                 # Other lines are added with a single newline for spacing
-                directed_learning_section += f"{line}\n\n"
+                directed_learning_section += f"{latex_escape(line)}\n\n"
         
         # Add extra space between subsections for clarity
         directed_learning_section += "\n\n"
     
     # Append the new section to the LaTeX content
-    latex_text = latex_text.replace("\\end{document}", "").strip()  # Remove existing \end{document}
+    latex_text = remove_end_document(latex_text)  # Remove existing \end{document}
     latex_text += "\n\n" + directed_learning_section + "\n\n\\end{document}"  # Add the new section and re-add \end{document}
     
     return latex_text
@@ -2772,13 +3635,397 @@ def add_directed_student_learning(word_text, latex_text):
 
 
 
-def main():
+def known_section_markers():
+    # Every start/end marker used by the section builders, indexed together in one pass
+    marker_pairs = [COURSE_MARKERS, GRANT_MARKERS, IMPACT_MARKERS, SERVICE_TO_UNI_MARKERS,
+                    SERVICE_TO_SOCIETY_MARKERS, SERVICE_TO_DISCIPLINE_MARKERS]
+    marker_pairs += list(PUBLICATION_MARKERS.values()) + list(PRESENTATION_MARKERS.values())
+    marker_pairs += AWARD_MARKERS + DIRECTED_LEARNING_MARKERS
+    return {marker for pair in marker_pairs for marker in pair}
+
+class DocumentSlot:
+    """Placeholder in a stage's arguments for the document the stage builds on."""
+
+class RecordedSection(LatexDocument):
+    """
+    Document handed to a section builder running on a worker.
+
+    The builder's calls are recorded instead of applied; replay() then applies them to
+    the real document in stage order, which gives exactly the sequential result.
+    """
+
+    def __init__(self):
+        self.operations = []
+        self.stats = None
+        # The builders always run on a document that ends with \end{document}
+        self._has_end = True
+
+    def append(self, fragment):
+        self.operations.append(("append", fragment))
+        if END_DOCUMENT in fragment:
+            self._has_end = True
+        return self
+
+    def has_end_document(self):
+        return self._has_end
+
+    def remove_end_document(self):
+        self.operations.append(("remove_end_document",))
+        self._has_end = False
+        return self
+
+    def insert_before_end_document(self, fragment):
+        self.operations.append(("insert_before_end_document", fragment))
+        return self
+
+    def strip(self):
+        self.operations.append(("strip",))
+        return self
+
+    @classmethod
+    def from_operations(cls, operations):
+        recording = cls()
+        recording.operations = list(operations)
+        return recording
+
+    def replay(self, document):
+        for name, *arguments in self.operations:
+            document = getattr(document, name)(*arguments)
+        return document
+
+def marker_sources(word_text, marker_pairs):
+    # The dossier slices a builder reads, used to tell whether its output can change
+    return [extract_text_between_markers(word_text, start, end) for start, end in marker_pairs]
+
+def section_stages(word_text, table_data, entry_filter=None, mark_mentees=None, owner=None):
+    """
+    The section builders run by main(), in document order, as
+    (function, arguments, sources) where sources is everything from the dossier
+    the builder reads. `entry_filter` selects the publications and presentations,
+    `mark_mentees` is a MENTEE_MARKS key or None and `owner` an OwnerProfile
+    (DEFAULT_OWNER when None).
+    """
+    owner = owner or DEFAULT_OWNER
+    document = DocumentSlot()
+    tables = [repr(table_data)]
+    return [
+        (add_education_section, (document, table_data, "Degrees - Dates"), tables),
+        (add_awards_and_honors, (document, word_text), marker_sources(word_text, AWARD_MARKERS)),
+        (extract_publications, (word_text, document, entry_filter, mark_mentees, owner),
+         marker_sources(word_text, list(PUBLICATION_MARKERS.values()) + DIRECTED_LEARNING_MARKERS)),
+        (extract_presentations, (word_text, document, entry_filter, owner), marker_sources(word_text, PRESENTATION_MARKERS.values())),
+        (add_professional_positions_to_latex, (document, table_data, owner), tables),
+        (extract_contract_project_and_grants, (word_text, document, owner), marker_sources(word_text, [GRANT_MARKERS])),
+        (process_courses_from_word, (word_text, document), marker_sources(word_text, [COURSE_MARKERS])),
+        (add_directed_student_learning, (word_text, document), marker_sources(word_text, DIRECTED_LEARNING_MARKERS)),
+        (add_impact_in_society, (word_text, document), marker_sources(word_text, [IMPACT_MARKERS])),
+        (add_service_to_uni, (word_text, document), marker_sources(word_text, [SERVICE_TO_UNI_MARKERS])),
+        (add_service_to_society_as_rep_of_uni, (word_text, document), marker_sources(word_text, [SERVICE_TO_SOCIETY_MARKERS])),
+        (add_service_to_discipline_and_to_the_profession, (word_text, document), marker_sources(word_text, [SERVICE_TO_DISCIPLINE_MARKERS])),
+    ]
+
+def code_digest(code, digest):
+    # Bytecode plus the constants and names it refers to; co_code alone only holds
+    # constant indexes, so builders differing in a string literal would look the same
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for constant in code.co_consts:
+        if hasattr(constant, "co_code"):
+            code_digest(constant, digest)
+        elif isinstance(constant, frozenset):
+            # `x in {...}` literals; their repr order changes with string hash randomization
+            digest.update(repr(sorted(constant, key=repr)).encode() + b"\0")
+        else:
+            digest.update(repr(constant).encode() + b"\0")
+
+def _module_source_digest():
+    # Covers every helper, class and table the builders use, so editing the script
+    # invalidates recorded sections without a version to bump by hand
+    with open(os.path.abspath(__file__), 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+MODULE_SOURCE_DIGEST = _module_source_digest()
+
+def section_stage_key(stage):
+    # Hash of the builder's source slices, its code and the source of this module
+    function, arguments, sources = stage
+    digest = hashlib.sha256()
+    digest.update(f"{MODULE_SOURCE_DIGEST}-{function.__name__}\n".encode())
+    code_digest(function.__code__, digest)
+    for argument in arguments:
+        # Small settings such as a table header; the dossier itself is covered by sources
+        if isinstance(argument, str) and len(argument) < 200:
+            digest.update(argument.encode() + b"\0")
+        elif isinstance(argument, (EntryFilter, OwnerProfile)):
+            digest.update(repr(argument).encode() + b"\0")
+    for source in sources:
+        digest.update(source.encode() + b"\0")
+    return digest.hexdigest()
+
+def section_manifest_path(cache_dir, output_filename):
+    name = hashlib.sha256(os.path.abspath(output_filename).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"sections-{name}.marshal")
+
+def load_section_manifest(manifest_path):
+    # {builder name: (key, recorded operations)} from the previous incremental run
+    try:
+        with open(manifest_path, 'rb') as file:
+            return marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+
+def save_section_manifest(manifest_path, manifest):
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        marshal.dump(manifest, file)
+    os.replace(temp_path, manifest_path)
+
+def run_section_stage(stage, document):
+    function, arguments, _ = stage
+    arguments = [document if isinstance(argument, DocumentSlot) else argument for argument in arguments]
+
+    # Each builder gets its own stats so they can be carried back from a worker process
+    stats = PipelineStats()
+    outer = getattr(_stats_local, "stats", None)
+    _stats_local.stats = stats
+    try:
+        with stats.stage(function.__name__):
+            document = function(*arguments)
+    finally:
+        _stats_local.stats = outer
+    return document, stats
+
+def record_section_stage(stage):
+    # Runs on a worker: build the section against a recording document
+    recording, stats = run_section_stage(stage, RecordedSection())
+    recording.stats = stats
+    return recording
+
+def configure_worker(regex_profile, entry_time_budget):
+    global STUDENT_ENTRY_TIME_BUDGET
+    REGEX.profile = regex_profile
+    STUDENT_ENTRY_TIME_BUDGET = entry_time_budget
+
+def record_section_stages(stages, jobs=1, executor="process"):
+    if jobs <= 1 or len(stages) <= 1:
+        return [record_section_stage(stage) for stage in stages]
+    if executor == "process":
+        # Spawned workers import the module afresh, so hand them the run's settings
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=configure_worker,
+                                   initargs=(REGEX.profile, STUDENT_ENTRY_TIME_BUDGET))
+    else:
+        pool = ThreadPoolExecutor(max_workers=jobs)
+    with pool:
+        return list(pool.map(record_section_stage, stages))
+
+def build_sections(document, stages, jobs=1, executor="process", manifest_path=None):
+    """
+    Run the section builders on `document`. With jobs > 1 the builders run concurrently
+    on a thread or process pool and their recorded output is applied in stage order.
+
+    With a manifest_path the build is incremental: only builders whose key
+    (section_stage_key) changed since the last run are executed, the others are
+    replayed from the manifest.
+    """
+    if manifest_path is None and jobs <= 1:
+        for stage in stages:
+            document, stats = run_section_stage(stage, document)
+            current_stats().merge(stats)
+        return document
+
+    for recording in section_recordings(stages, jobs, executor, manifest_path):
+        # Sections replayed from the manifest were not rendered this run and have no stats
+        if recording.stats is not None:
+            current_stats().merge(recording.stats)
+        document = recording.replay(document)
+    return document
+
+def build_section_fragments(stages, jobs=1, executor="process", manifest_path=None):
+    # [(builder name, the LaTeX it adds to the document)] in stage order
+    fragments = []
+    for stage, recording in zip(stages, section_recordings(stages, jobs, executor, manifest_path)):
+        if recording.stats is not None:
+            current_stats().merge(recording.stats)
+        # The builders strip \end{document} and add it back, on its own document that leaves only their section
+        text = recording.replay(LatexDocument(END_DOCUMENT)).render()
+        fragments.append((stage[0].__name__, text.replace(END_DOCUMENT, "").strip()))
+    return fragments
+
+def section_recordings(stages, jobs=1, executor="process", manifest_path=None):
+    """
+    A RecordedSection per stage. With a manifest_path only the builders whose
+    key (section_stage_key) changed since the last run are executed, the others
+    are replayed from the manifest.
+    """
+    if manifest_path is None:
+        recordings = record_section_stages(stages, jobs, executor)
+    else:
+        previous = load_section_manifest(manifest_path)
+        keys = [section_stage_key(stage) for stage in stages]
+        names = [stage[0].__name__ for stage in stages]
+
+        changed = [i for i, (name, key) in enumerate(zip(names, keys)) if previous.get(name, (None,))[0] != key]
+        rendered = dict(zip(changed, record_section_stages([stages[i] for i in changed], jobs, executor)))
+        print(f"Incremental build: re-rendered {len(changed)} of {len(stages)} sections")
+
+        recordings = []
+        manifest = {}
+        for i, (name, key) in enumerate(zip(names, keys)):
+            recording = rendered.get(i) or RecordedSection.from_operations(previous[name][1])
+            manifest[name] = (key, recording.operations)
+            recordings.append(recording)
+        save_section_manifest(manifest_path, manifest)
+    return recordings
+
+def write_mentee_report(path, word_text, entry_filter=None):
+    # Per-student publication lists plus the number of papers with at least one mentee
+    index, mentees = mentee_publications(word_text, entry_filter)
+    report = {
+        "papers with mentees": index.count_with({mentee.key for mentee, _ in mentees}),
+        "mentees": [{"name": mentee.name, "section": mentee.section, "title": mentee.title,
+                     "publications": [{"category": publication.category, "year": publication.year,
+                                       "title": publication.title} for publication in publications]}
+                    for mentee, publications in mentees],
+    }
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"{report['papers with mentees']} papers with mentees")
+
+def year_range(value):
+    # "2019-2024", "2019-" or "-2024"; a single year is a one-year window
+    first, separator, last = value.partition("-")
+    try:
+        first = int(first) if first.strip() else None
+        last = int(last) if last.strip() else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a year range such as 2019-2024, got '{value}'")
+    if not separator:
+        last = first
+    return first, last
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Build a LaTeX CV from a Word dossier.")
+    parser.add_argument("--input", default="CV_Data.docx",
+                        help="Word dossier to read (default: %(default)s)")
+    parser.add_argument("--output", default="output.tex",
+                        help="LaTeX file to write (default: %(default)s)")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="build many CVs: a directory of .docx dossiers, a glob pattern or a JSON manifest; "
+                             "--jobs dossiers are built at a time, one per process")
+    parser.add_argument("--output-dir", metavar="DIR",
+                        help="where --batch writes <dossier name>.tex (default: next to each dossier)")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and rebuild incrementally whenever the dossier, the owner profile "
+                             "or a .sty file next to the output changes")
+    parser.add_argument("--watch-interval", type=float, default=0.5, metavar="SECONDS",
+                        help="how often --watch polls the files (default: %(default)s)")
+    parser.add_argument("--debounce", type=float, default=1.0, metavar="SECONDS",
+                        help="how long the files must stay unchanged before --watch rebuilds (default: %(default)s)")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="run a local HTTP service converting uploaded dossiers on PORT, with --jobs worker processes")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address --serve listens on (default: %(default)s)")
+    parser.add_argument("--max-queue", type=int, default=8, metavar="N",
+                        help="requests --serve lets wait for a worker before answering 503 (default: %(default)s)")
+    parser.add_argument("--split-sections", action="store_true",
+                        help="write each section to <output name>-sections/ and \\include it from the output file; "
+                             "--pdf previews the sections changed since the last compile in <output name>-preview.pdf "
+                             "before the full PDF")
+    parser.add_argument("--pdf", action="store_true",
+                        help="also compile the LaTeX output to a PDF next to it")
+    parser.add_argument("--tex-engine", metavar="ENGINE",
+                        help=f"TeX engine name or path for --pdf (default: the first of {', '.join(TEX_ENGINES)} found)")
+    parser.add_argument("--build-dir", default=LATEX_BUILD_DIR,
+                        help="directory keeping the LaTeX aux files between --pdf builds (default: %(default)s)")
+    parser.add_argument("--no-format", action="store_true",
+                        help="compile with the full preamble instead of a cached precompiled pdflatex format")
+    parser.add_argument("--cache-dir", default=DOSSIER_CACHE_DIR,
+                        help="directory for the parsed-dossier cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always parse the docx instead of using the parsed-dossier cache")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="number of workers rendering sections in parallel, or dossiers with --batch "
+                             "(default: %(default)s, sequential)")
+    parser.add_argument("--executor", choices=["process", "thread"], default="process",
+                        help="pool used when --jobs is greater than 1 (default: %(default)s)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-render only the sections whose dossier text changed since the last run")
+    parser.add_argument("--report", action="store_true",
+                        help="print wall/CPU time per stage and the pipeline counters")
+    parser.add_argument("--report-json", metavar="PATH",
+                        help="write the timing and counter report as JSON to PATH")
+    parser.add_argument("--profile-regex", action="store_true",
+                        help="count and time every call per named regex, shown in the report")
+    parser.add_argument("--entry-time-budget", type=float, metavar="SECONDS",
+                        help="report publication entries whose student annotation takes longer than SECONDS")
+    parser.add_argument("--years", type=year_range, metavar="FIRST-LAST",
+                        help="only publications and presentations from these years, e.g. 2019-2024 or 2019-")
+    parser.add_argument("--categories", nargs="+", metavar="CATEGORY",
+                        choices=list(PUBLICATION_MARKERS) + list(PRESENTATION_MARKERS),
+                        help="only these publication and presentation categories")
+    parser.add_argument("--max-entries", type=int, metavar="N",
+                        help="at most the N most recent publications and the N most recent presentations")
+    parser.add_argument("--near-duplicates", type=float, nargs="?", const=0.8, metavar="THRESHOLD",
+                        help="merge publications or presentations whose text similarity is at least THRESHOLD "
+                             "(Jaccard, default %(const)s) across categories and report the merges")
+    parser.add_argument("--owner", metavar="PATH",
+                        help="JSON owner profile (display_name, name_variants, title, title_dates, filter_lines) "
+                             "for building another faculty member's CV")
+    parser.add_argument("--mark-mentees", choices=list(MENTEE_MARKS),
+                        help="mark publication co-authors who are advised students or postdocs")
+    parser.add_argument("--mentee-report", metavar="PATH",
+                        help="write each advised student's co-authored publications as JSON to PATH")
+    args = parser.parse_args(argv)
+    if sum(bool(mode) for mode in (args.batch, args.watch, args.serve is not None)) > 1:
+        parser.error("--batch, --watch and --serve cannot be combined")
+    if args.batch and (args.mentee_report or args.owner):
+        parser.error("--batch takes owner profiles from the manifest or <dossier name>.owner.json, "
+                     "and does not write --mentee-report")
+    return args
+
+def build_cv(docx_bytes_or_path, options=None, owner=None):
+    """
+    The LaTeX source of the CV for a dossier given as a path or as the docx bytes.
+
+    `options` are parsed by parse_arguments(); without them nothing is read or
+    written besides the dossier path. The cache, the incremental manifest
+    (named after options.output) and the mentee report are only used when the
+    options ask for them. Timings and counters go to current_stats().
+    """
+    options = options or parse_arguments(["--no-cache"])
+    preamble, stages, manifest_path = _prepare_cv(docx_bytes_or_path, options, owner)
+
+    # Collect the sections as fragments and join them once at the end
+    text2 = build_sections(LatexDocument(preamble), stages, jobs=options.jobs, executor=options.executor,
+                           manifest_path=manifest_path)
+    with current_stats().stage("render"):
+        return text2.render()
+
+def build_cv_sections(docx_bytes_or_path, options=None, owner=None):
+    """
+    Like build_cv(), but the preamble and header (ending in \\end{document}) and
+    each builder's fragment separately, as [(builder name, LaTeX)] in document order.
+    """
+    options = options or parse_arguments(["--no-cache"])
+    preamble, stages, manifest_path = _prepare_cv(docx_bytes_or_path, options, owner)
+    fragments = build_section_fragments(stages, jobs=options.jobs, executor=options.executor,
+                                        manifest_path=manifest_path)
+    return preamble, fragments
+
+def _prepare_cv(docx_bytes_or_path, options, owner=None):
+    # The preamble, the section stages and the incremental manifest path for one dossier
+    owner = owner or DEFAULT_OWNER
+
     #open a file to read in C:\Users\rhk12\OneDrive - The Pennsylvania State University\resume\CV named main.tex 
     # open the file for reading
     #f = open(r'C:\Users\rhk12\OneDrive - The Pennsylvania State University\resume\CV\main.tex', 'r')
     #f = open(r'C:\Users\rhk12\OneDrive - The Pennsylvania State University\resume\CV\main.tex', 'r', encoding='utf-8')
     # Read the document
-    word_text, table_data = read_word_document("CV_Data.docx")
+    # Parse the dossier once, every stage below reads from it
+    with current_stats().stage("read_word_document"):
+        dossier = load_dossier(docx_bytes_or_path, cache_dir=None if options.no_cache else options.cache_dir)
+    word_text, table_data = dossier.text, dossier.tables
 
     # Write the content to a text file
     # with open("doc.txt", "w", encoding="utf-8") as file:
@@ -2787,71 +4034,762 @@ def main():
     # with open(word_text, 'r') as file:
     #     file.read()
     
-    filename = 'output.tex'
-    create_template_latex_file(filename)
+    # The preamble and header are built in memory, see latex_preamble
+    with current_stats().stage("template"):
+        preamble = latex_preamble(owner)
+
+    # Education, awards, publications, presentations, positions, grants, teaching,
+    # directed student learning, impact and service sections (see section_stages)
+    manifest_path = section_manifest_path(options.cache_dir, options.output) if options.incremental else None
+    first_year, last_year = options.years or (None, None)
+    entry_filter = None
+    if options.years or options.categories or options.max_entries is not None or options.near_duplicates is not None:
+        entry_filter = EntryFilter(first_year, last_year, options.categories, options.max_entries, options.near_duplicates)
+    stages = section_stages(word_text, table_data, entry_filter, options.mark_mentees, owner)
+    if options.mentee_report:
+        write_mentee_report(options.mentee_report, word_text, entry_filter)
     
-    with open(filename, 'r') as file:
-        text2 = file.read()
+    # write_courses_to_file(text, f1)
     
-    #add my formating package
-    text2 = add_custom_package(text2)
+    # text = process_courses(text)
     
-    #Set the section colors
-    text2 = set_section_colors(text2)
-      
-     # Format the header
-    text2 = format_header(text2)
+    # reorder the publications
+    # text = reorder_publications(text)
     
-    # add the date to the latex file
-    text2 = add_date_to_header(text2)
+    # # reorder the student sections
+    # text = reorder_student_sections4(text)
+    
+    # # process the student thesis titles
+    # text = process_student_thesis_titles(text, dossier)
+    return preamble, stages, manifest_path
 
-    text2 = add_education_section(text2, table_data, "Degrees - Dates")
+def build_cv_file(input_path, filename, args, owner=None):
+    """
+    build_cv() written to `filename`, which also names the incremental manifest.
+    With args.split_sections the sections go to their own files instead (see
+    write_split_cv).
+    """
+    options = argparse.Namespace(**{**vars(args), "output": filename})
+    if args.split_sections:
+        preamble, fragments = build_cv_sections(input_path, options, owner)
+        with current_stats().stage("write output"):
+            write_split_cv(filename, preamble, fragments)
+    else:
+        text = build_cv(input_path, options, owner)
+        with current_stats().stage("write output"):
+            with open(filename, 'w') as file:
+                file.write(text)
+
+# File name of each builder's fragment in --split-sections output
+SECTION_FILE_NAMES = {
+    "add_education_section": "education",
+    "add_awards_and_honors": "awards",
+    "extract_publications": "publications",
+    "extract_presentations": "presentations",
+    "add_professional_positions_to_latex": "positions",
+    "extract_contract_project_and_grants": "grants",
+    "process_courses_from_word": "teaching",
+    "add_directed_student_learning": "directed-learning",
+    "add_impact_in_society": "impact",
+    "add_service_to_uni": "service-university",
+    "add_service_to_society_as_rep_of_uni": "service-society",
+    "add_service_to_discipline_and_to_the_profession": "service-discipline",
+}
 
-    text2 = add_awards_and_honors(text2, word_text)
+def write_split_cv(filename, preamble, fragments):
+    """
+    A master file `filename` that \\includes one file per section from the
+    <name>-sections directory next to it. Only files whose text changed are
+    rewritten, so compile_latex sees by content which ones it has yet to typeset.
+    \\include starts every section on a new page.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    section_dir = os.path.join(os.path.dirname(filename), f"{stem}-sections")
+    os.makedirs(section_dir, exist_ok=True)
+
+    def write_if_changed(path, text):
+        try:
+            with open(path, 'r') as file:
+                if file.read() == text:
+                    return False
+        except OSError:
+            pass
+        with open(path, 'w') as file:
+            file.write(text)
+        return True
+
+    includes = []
+    for name, fragment in fragments:
+        include = f"{stem}-sections/{SECTION_FILE_NAMES.get(name, name)}"
+        includes.append(include)
+        if write_if_changed(os.path.join(section_dir, os.path.basename(include) + ".tex"), fragment + "\n"):
+            record_counter("section files written")
+
+    master = remove_end_document(preamble) + "\n\n" + "".join(f"\\include{{{include}}}\n" for include in includes)
+    master += "\n" + END_DOCUMENT + "\n"
+    write_if_changed(filename, master)
+
+# TeX engines tried in order when none is given; the template supports all three
+TEX_ENGINES = ("pdflatex", "xelatex", "lualatex")
+LATEX_BUILD_DIR = ".cv_build"
+LATEX_MAX_RUNS = 5
+# Files whose content decides whether another pass can still change the output
+LATEX_STATE_EXTENSIONS = (".aux", ".toc", ".out")
+
+def find_tex_engine(engine=None):
+    # Full path of `engine` (a name or a path), or of the first installed TEX_ENGINES
+    for name in [engine] if engine else TEX_ENGINES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise RuntimeError(f"No TeX engine found (looked for {engine or ', '.join(TEX_ENGINES)}); "
+                       "install TeX Live or MiKTeX or pass --tex-engine")
+
+def latex_state_hash(build_dir, jobname, includes=()):
+    # The document's state files plus the .aux of every \include'd file
+    paths = [jobname + extension for extension in LATEX_STATE_EXTENSIONS] + [include + ".aux" for include in includes]
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(os.path.join(build_dir, path), 'rb') as file:
+                digest.update(path.encode() + file.read())
+        except OSError:
+            digest.update(path.encode() + b"missing")
+    return digest.hexdigest()
+
+REGEX.add("included file", r'^\\include\{([^}]*)\}', re.MULTILINE)
+
+# Engines whose formats can hold the whole preamble; xetex and luatex cannot dump loaded fonts
+FORMAT_ENGINES = ("pdflatex",)
+REGEX.add("used package", r'\\usepackage(?:\[[^\]]*\])?\{([^}]*)\}')
+# A finished format; one still being dumped has the dumping process id appended
+REGEX.add("format file", r'cvpreamble-[0-9a-f]{16}\.fmt$')
+
+# Preamble lines that change from build to build, such as the month in the first page
+# header (add_date_to_header); split_preamble leaves them to the body so the format lasts
+PREAMBLE_BODY_MARKERS = ("\\fancypagestyle{firstpage}", "\\thispagestyle{firstpage}")
+
+def split_preamble(latex_text):
+    # (the preamble up to its first per-build line, the rest), or (latex_text, "") without a document body
+    start = latex_text.find("\\begin{document}")
+    if start == -1:
+        return latex_text, ""
+    for marker in PREAMBLE_BODY_MARKERS:
+        position = latex_text.find(marker, 0, start)
+        if position != -1:
+            start = position
+    return latex_text[:start], latex_text[start:]
+
+def preamble_format_name(preamble, engine_path, source_dir):
+    # Keyed by the preamble, the engine and any local package it loads, such as mystyle.sty
+    digest = hashlib.sha256(f"{engine_path}\n{preamble}".encode())
+    for packages in REGEX.findall("used package", preamble):
+        for package in packages.split(","):
+            try:
+                with open(os.path.join(source_dir, package.strip() + ".sty"), 'rb') as file:
+                    digest.update(file.read())
+            except OSError:
+                pass
+    return "cvpreamble-" + digest.hexdigest()[:16]
 
-    text2 = extract_publications(word_text,text2)
+def build_preamble_format(preamble, engine_path, format_dir, source_dir):
+    """
+    The name of a format with `preamble` already loaded, dumped into
+    `format_dir` on first use (mylatexformat style). Returns None when the
+    dump fails, the document is then compiled with its own preamble.
+    """
+    format_name = preamble_format_name(preamble, engine_path, source_dir)
+    if os.path.exists(os.path.join(format_dir, format_name + ".fmt")):
+        record_counter("latex format hits")
+        return format_name
+
+    os.makedirs(format_dir, exist_ok=True)
+    # Dumped under a per-process name and renamed, so concurrent batch workers never load half a format
+    jobname = f"{format_name}-{os.getpid()}"
+    preamble_path = os.path.join(format_dir, jobname + ".tex")
+    with open(preamble_path, 'w') as file:
+        file.write(preamble + "\n\\dump\n")
+    command = [engine_path, "-ini", "-interaction=nonstopmode", "-halt-on-error", f"-jobname={jobname}",
+               f"-output-directory={format_dir}", "&" + os.path.splitext(os.path.basename(engine_path))[0], preamble_path]
+    with current_stats().stage("latex format"):
+        result = subprocess.run(command, cwd=source_dir, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace")
+    record_counter("latex format builds")
+    if result.returncode != 0 or not os.path.exists(os.path.join(format_dir, jobname + ".fmt")):
+        print(f"Could not dump the preamble format, compiling without it (log: {os.path.join(format_dir, jobname + '.log')})")
+        return None
+    os.replace(os.path.join(format_dir, jobname + ".fmt"), os.path.join(format_dir, format_name + ".fmt"))
+    for extension in (".tex", ".log"):
+        if os.path.exists(os.path.join(format_dir, jobname + extension)):
+            os.remove(os.path.join(format_dir, jobname + extension))
+    # Formats of earlier preambles would otherwise pile up; a build still using one
+    # falls back to compiling without it (compile_latex)
+    for path in glob.glob(os.path.join(format_dir, "cvpreamble-*.fmt")):
+        if os.path.basename(path) != format_name + ".fmt" and REGEX.match("format file", os.path.basename(path)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return format_name
+
+def file_digest(path):
+    # sha256 of a file's bytes, None when it cannot be read
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
 
-    text2 = extract_presentations(word_text, text2)
+def compile_latex(tex_path, engine=None, build_dir=LATEX_BUILD_DIR, max_runs=LATEX_MAX_RUNS, use_format=True):
+    """
+    Compile `tex_path` to a PDF next to it, latexmk style: the build directory
+    keeps the .aux/.toc state between builds and the engine reruns only until a
+    pass leaves that state unchanged, at most `max_runs` passes.
 
-    text2 = add_professional_positions_to_latex(text2, table_data, "Professor of Mechanical Engineering")
+    With `use_format` and a FORMAT_ENGINES engine, the passes start from a format
+    with the preamble preloaded (build_preamble_format) and only typeset the body.
 
-    text2 = extract_contract_project_and_grants(word_text,text2)
+    For a document of \\include files (--split-sections) the build directory
+    records which version of each file was last compiled there. When only some
+    changed and the others' .aux files are in place, the changed ones are first
+    typeset alone with \\includeonly into <name>-preview.pdf, so their
+    references settle on the small document; one full pass then writes the
+    complete PDF.
 
-    text2 = process_courses_from_word(word_text, text2)
+    A pass that fails from the format is retried once without it, as a stale
+    format must not fail the build.
 
-    text2 = add_directed_student_learning(word_text,text2)
+    Each pass is timed as a "latex run N" stage. Returns the PDF path and raises
+    RuntimeError when no engine is found or a pass fails.
+    """
+    engine_path = find_tex_engine(engine)
+    tex_path = os.path.abspath(tex_path)
+    jobname = os.path.splitext(os.path.basename(tex_path))[0]
+    builds_dir = build_dir
+    # One directory per document, so documents with the same name never share aux files
+    build_dir = os.path.join(os.path.abspath(build_dir), hashlib.sha256(tex_path.encode()).hexdigest()[:16])
+    os.makedirs(build_dir, exist_ok=True)
+
+    source_dir = os.path.dirname(tex_path)
+    with open(tex_path, 'r') as file:
+        latex_text = file.read()
+    # The engine writes each \include'd file's .aux under the same relative path, it does not create the directories
+    includes = REGEX.findall("included file", latex_text)
+    for include in includes:
+        os.makedirs(os.path.join(build_dir, os.path.dirname(include)), exist_ok=True)
+
+    # The \include'd files compiled into this build directory, by content
+    record_path = os.path.join(build_dir, jobname + ".sections.json")
+    digests = {include: file_digest(os.path.join(source_dir, include + ".tex")) for include in includes}
+    try:
+        with open(record_path, 'r') as file:
+            record = json.load(file)
+    except (OSError, ValueError):
+        record = {}
+    changed = [include for include in includes
+               if record.get("sections", {}).get(include) != digests[include]
+               or not os.path.exists(os.path.join(build_dir, include + ".aux"))]
+    master_digest = hashlib.sha256(latex_text.encode()).hexdigest()
+    # A new master (preamble or section list) or a cold build directory needs the whole document
+    partial = record.get("master") == master_digest and 0 < len(changed) < len(includes)
+
+    input_path, options, env, format_name = tex_path, [], None, None
+    if use_format and os.path.splitext(os.path.basename(engine_path))[0] in FORMAT_ENGINES:
+        preamble, body = split_preamble(latex_text)
+        format_dir = os.path.join(os.path.dirname(build_dir), "formats")
+        format_name = build_preamble_format(preamble, engine_path, format_dir, source_dir) if body else None
+        if format_name:
+            # The body alone, under the document's jobname so the aux and PDF names stay the same
+            input_path = os.path.join(build_dir, jobname + ".body.tex")
+            with open(input_path, 'w') as file:
+                file.write(body)
+            options = [f"-fmt={format_name}"]
+            # A trailing separator keeps the engine's own format directories on the search path
+            env = dict(os.environ, TEXFORMATS=format_dir + os.pathsep)
+
+    def run_passes(input_path, runs):
+        # Up to `runs` passes until the state settles; the failed run's result, or None
+        command = [engine_path, *options, "-interaction=nonstopmode", "-halt-on-error", "-file-line-error",
+                   f"-output-directory={build_dir}", f"-jobname={jobname}", input_path]
+        for run in range(1, runs + 1):
+            before = latex_state_hash(build_dir, jobname, includes)
+            start = time.perf_counter()
+            # From the document's directory, so \usepackage{mystyle} finds mystyle.sty there
+            with current_stats().stage(f"latex run {run}"):
+                result = subprocess.run(command, cwd=source_dir, env=env, stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace")
+            record_counter("latex runs")
+            print(f"{os.path.basename(engine_path)} run {run}: {time.perf_counter() - start:.2f}s")
+            if result.returncode != 0:
+                return result
+            if latex_state_hash(build_dir, jobname, includes) == before:
+                return None
+        print(f"References still changing after {runs} runs of {os.path.basename(engine_path)}")
+        return None
 
-    text2 = add_impact_in_society(word_text,text2)
-    
-    text2 = add_service_to_uni(word_text,text2)
+    stem = os.path.splitext(tex_path)[0]
+    failed = None
+    if partial:
+        # \includeonly has to come before \begin{document}, so it goes ahead of the input on the command line
+        print(f"Typesetting only {', '.join(os.path.basename(include) for include in changed)} into {stem}-preview.pdf")
+        failed = run_passes(f"\\includeonly{{{','.join(changed)}}}\\input{{{input_path}}}", max_runs)
+        if not failed:
+            shutil.copyfile(os.path.join(build_dir, jobname + ".pdf"), stem + "-preview.pdf")
+    if not failed:
+        # The complete document; after a preview its references have already settled
+        failed = run_passes(input_path, max_runs)
+
+    if failed:
+        if format_name:
+            print(f"{os.path.basename(engine_path)} failed from the preamble format, compiling without it")
+            record_counter("latex format fallbacks")
+            pdf_path = compile_latex(tex_path, engine, builds_dir, max_runs, use_format=False)
+            # The document compiles on its own, so the format was at fault and the next build dumps it again
+            try:
+                os.remove(os.path.join(format_dir, format_name + ".fmt"))
+            except OSError:
+                pass
+            return pdf_path
+        log_tail = "\n".join(failed.stdout.splitlines()[-20:])
+        raise RuntimeError(f"{os.path.basename(engine_path)} failed on {tex_path} "
+                           f"(log: {os.path.join(build_dir, jobname + '.log')}):\n{log_tail}")
+
+    if includes:
+        with open(record_path, 'w') as file:
+            json.dump({"master": master_digest, "sections": digests}, file, indent=2)
+    pdf_path = stem + ".pdf"
+    shutil.copyfile(os.path.join(build_dir, jobname + ".pdf"), pdf_path)
+    return pdf_path
+
+def batch_items(source, output_dir=None):
+    """
+    (dossier, output, owner profile path or None) for every dossier in `source`:
+    a directory, a glob pattern or a JSON manifest listing objects with "input"
+    and optional "output" and "owner" paths, relative to the manifest.
 
-    text2 = add_service_to_society_as_rep_of_uni(word_text, text2)
+    Without a manifest the owner profile is <dossier name>.owner.json next to the
+    dossier when there is one, and the output is <dossier name>.tex.
+    """
+    if source.endswith(".json") and os.path.isfile(source):
+        with open(source, 'r') as file:
+            entries = json.load(file)
+        base = os.path.dirname(source)
+        items = []
+        for entry in entries:
+            input_path = os.path.join(base, entry["input"])
+            output = entry.get("output")
+            output = os.path.join(base, output) if output else default_batch_output(input_path, output_dir)
+            owner = os.path.join(base, entry["owner"]) if entry.get("owner") else None
+            items.append((input_path, output, owner))
+        return items
+
+    pattern = os.path.join(source, "*.docx") if os.path.isdir(source) else source
+    items = []
+    # Word keeps "~$name.docx" lock files next to open documents
+    for input_path in sorted(path for path in glob.glob(pattern) if not os.path.basename(path).startswith("~$")):
+        owner = os.path.splitext(input_path)[0] + ".owner.json"
+        items.append((input_path, default_batch_output(input_path, output_dir), owner if os.path.exists(owner) else None))
+    return items
+
+def default_batch_output(input_path, output_dir=None):
+    name = os.path.splitext(os.path.basename(input_path))[0] + ".tex"
+    return os.path.join(output_dir if output_dir else os.path.dirname(input_path), name)
+
+def build_batch_item(item, args):
+    # Runs on a batch worker; a failing dossier is reported instead of stopping the batch
+    input_path, output, owner_path = item
+    stats = PipelineStats()
+    _stats_local.stats = stats
+    start = time.perf_counter()
+    try:
+        owner = OwnerProfile.load(owner_path) if owner_path else DEFAULT_OWNER
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        build_cv_file(input_path, output, args, owner)
+        if args.pdf:
+            compile_latex(output, args.tex_engine, args.build_dir, use_format=not args.no_format)
+        error = None
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    finally:
+        _stats_local.stats = None
+    return input_path, output, time.perf_counter() - start, error, stats
+
+def batch_pool(jobs):
+    return ProcessPoolExecutor(max_workers=jobs, initializer=configure_worker,
+                               initargs=(REGEX.profile, STUDENT_ENTRY_TIME_BUDGET))
+
+def run_batch(args):
+    """
+    Build every dossier of args.batch on a pool of args.jobs processes, each
+    dossier in one process with its sections rendered sequentially. Prints a
+    summary and returns the exit status, 1 when any dossier failed.
+
+    At most args.jobs dossiers are in flight, so when a worker dies (e.g. out
+    of memory) the suspects are the dossiers that were running. The pool is
+    replaced and each suspect is retried on its own; only one that brings
+    down its pool alone is reported as failed.
+    """
+    items = batch_items(args.batch, args.output_dir)
+    if not items:
+        print(f"No dossiers found in {args.batch}")
+        return 1
+
+    # Section rendering is sequential within a dossier, the dossiers themselves are the parallel work
+    item_args = argparse.Namespace(**{**vars(args), "jobs": 1})
+    jobs = max(args.jobs, 1)
+    start = time.perf_counter()
+    results = []
+    pending = deque(items)
+    suspects = deque()
+    running = {}  # future -> (item, whether it ran alone)
+    pool = batch_pool(jobs)
+    try:
+        while pending or suspects or running:
+            if suspects:
+                # Once the pool's other futures are settled, a suspect gets the pool to itself
+                if not running:
+                    item = suspects.popleft()
+                    running[pool.submit(build_batch_item, item, item_args)] = (item, True)
+            else:
+                while pending and len(running) < jobs:
+                    item = pending.popleft()
+                    running[pool.submit(build_batch_item, item, item_args)] = (item, False)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                item, alone = running.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as exception:
+                    broken = True
+                    if not alone:
+                        suspects.append(item)
+                        continue
+                    # This dossier takes its worker down by itself
+                    result = (item[0], item[1], 0.0, f"{type(exception).__name__}: {exception}", PipelineStats())
+                except Exception as exception:
+                    result = (item[0], item[1], 0.0, f"{type(exception).__name__}: {exception}", PipelineStats())
+                results.append(result)
+                input_path, output, seconds, error, stats = result
+                PIPELINE_STATS.merge(stats)
+                print(f"{'FAILED' if error else 'ok':>6}  {seconds:7.2f}s  {input_path}" + (f"\n        {error}" if error else f" -> {output}"))
+            if broken:
+                # The old pool's remaining futures still resolve, new work goes to a fresh pool
+                pool.shutdown(wait=False)
+                pool = batch_pool(jobs)
+    finally:
+        pool.shutdown()
+    wall = time.perf_counter() - start
+
+    failures = [result for result in results if result[3]]
+    busy = sum(result[2] for result in results)
+    print(f"\nBuilt {len(results) - len(failures)} of {len(results)} CVs in {wall:.2f}s "
+          f"({len(results) / wall:.2f} CVs/s, {busy / wall:.1f} of {jobs} workers busy on average)")
+    for input_path, _, _, error, _ in sorted(failures):
+        print(f"  failed: {input_path}: {error}")
+
+    if args.report:
+        print(PIPELINE_STATS.format_table())
+    if args.report_json:
+        report = PIPELINE_STATS.as_dict()
+        report["batch"] = [{"input": input_path, "output": output, "seconds": seconds, "error": error}
+                           for input_path, output, seconds, error, _ in sorted(results, key=lambda result: result[0])]
+        with open(args.report_json, 'w') as file:
+            json.dump(report, file, indent=2)
+    return 1 if failures else 0
+
+def watched_files(args):
+    # The dossier, the owner profile and the style files next to the output, which the compile stage reads
+    paths = [args.input] + ([args.owner] if args.owner else [])
+    return paths + sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(args.output)), "*.sty")))
+
+def file_signature(paths):
+    # (path, mtime, size) per path, a missing file included as such
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+def rebuild(args):
+    # One watch-mode build; a failure is reported and the watch goes on
+    stats = PipelineStats()
+    _stats_local.stats = stats
+    start = time.perf_counter()
+    try:
+        owner = OwnerProfile.load(args.owner) if args.owner else DEFAULT_OWNER
+        build_cv_file(args.input, args.output, args, owner)
+        if args.pdf:
+            compile_latex(args.output, args.tex_engine, args.build_dir, use_format=not args.no_format)
+        print(f"Rebuilt {args.output}{' and its PDF' if args.pdf else ''} in {time.perf_counter() - start:.2f}s")
+    except Exception as error:
+        # Word writes the docx in several steps, a half-saved file is picked up by the next change
+        print(f"Rebuild failed after {time.perf_counter() - start:.2f}s: {type(error).__name__}: {error}")
+    finally:
+        _stats_local.stats = None
+    if args.report:
+        print(stats.format_table())
+
+def watch(args):
+    """
+    Rebuild whenever a watched file changes, in this process so the imports,
+    compiled patterns and section indexes stay warm. Builds are incremental:
+    the dossier cache and the section manifest limit the work to the changed
+    sections. Changes are polled every args.watch_interval seconds and a
+    rebuild waits until the files have been unchanged for args.debounce seconds.
+    """
+    args = argparse.Namespace(**{**vars(args), "incremental": True})
+    rebuild(args)
+    signature = file_signature(watched_files(args))
+    print(f"Watching {', '.join(path for path, _, _ in signature)} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            current = file_signature(watched_files(args))
+            if current == signature:
+                continue
+            # Debounce: a save often arrives as several writes
+            settled = None
+            while current != settled:
+                settled = current
+                time.sleep(args.debounce)
+                current = file_signature(watched_files(args))
+            signature = current
+            rebuild(args)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+# Largest dossier upload the service accepts
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+# Errors that mean the upload is not a readable docx (including a zip without word/document.xml),
+# answered 422 and counted as invalid; anything else is the service's fault
+DOSSIER_ERRORS = (zipfile.BadZipFile, ET.ParseError)
+
+def convert_dossier(docx_bytes, options, owner=None, pdf=False):
+    """
+    Runs on a service worker: the LaTeX source, or the PDF compiled from it, of an
+    uploaded dossier. PDFs are compiled in a directory per worker process under
+    options.build_dir, with the .sty files of the service's directory next to the
+    .tex, so aux files and the preamble format stay warm between requests.
+    """
+    stats = PipelineStats()
+    _stats_local.stats = stats
+    try:
+        latex_text = build_cv(docx_bytes, options, owner)
+        if not pdf:
+            return latex_text.encode()
+        work_dir = os.path.join(os.path.abspath(options.build_dir), "service", str(os.getpid()))
+        os.makedirs(work_dir, exist_ok=True)
+        for style in glob.glob(os.path.join(os.path.dirname(os.path.abspath(options.output)), "*.sty")):
+            shutil.copy(style, work_dir)
+        tex_path = os.path.join(work_dir, "cv.tex")
+        with open(tex_path, 'w') as file:
+            file.write(latex_text)
+        with open(compile_latex(tex_path, options.tex_engine, options.build_dir, use_format=not options.no_format), 'rb') as file:
+            return file.read()
+    finally:
+        _stats_local.stats = None
+
+def warm_worker():
+    # Submitted once per worker at startup, so the first requests do not pay for starting a process
+    return os.getpid()
+
+class ConversionService:
+    """
+    A pool of `workers` processes converting uploads with at most `max_queue`
+    more waiting; requests beyond that are turned away instead of piling up.
+    When a worker dies the pool is replaced and the requests it was running
+    are retried once on the new one.
+    """
 
-    text2 = add_service_to_discipline_and_to_the_profession(word_text, text2)
-    
-    # write_courses_to_file(text, f1)
-    
-    # text = process_courses(text)
-    
-    # reorder the publications
-    # text = reorder_publications(text)
-    
-    # # reorder the student sections
-    # text = reorder_student_sections4(text)
-    
-    # # process the student thesis titles
-    # text = process_student_thesis_titles(text,"University+Dossier-20240524-075749-CDT.docx")
-    with open(filename, 'w') as file:
-        file.write(text2)
+    def __init__(self, options, workers, max_queue):
+        self.options = options
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pool = self.start_pool()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {"completed": 0, "failed": 0, "invalid": 0, "rejected": 0, "pool_restarts": 0}
+        self.seconds = 0.0
+
+    def start_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=configure_worker,
+                                   initargs=(REGEX.profile, STUDENT_ENTRY_TIME_BUDGET))
+        for future in [pool.submit(warm_worker) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def replace_pool(self, broken):
+        # Requests that failed on the same broken pool replace it only once
+        with self.lock:
+            if self.pool is broken:
+                self.pool = self.start_pool()
+                self.counters["pool_restarts"] += 1
+                broken.shutdown(wait=False)
+            return self.pool
+
+    def convert(self, docx_bytes, owner=None, pdf=False):
+        # The converted bytes, or None when the queue is full
+        with self.lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.counters["rejected"] += 1
+                return None
+            self.in_flight += 1
+            pool = self.pool
+        start = time.perf_counter()
+        outcome = "failed"
+        try:
+            try:
+                result = pool.submit(convert_dossier, docx_bytes, self.options, owner, pdf).result()
+            except BrokenProcessPool:
+                # A worker died, e.g. out of memory; one more try on fresh workers
+                pool = self.replace_pool(pool)
+                result = pool.submit(convert_dossier, docx_bytes, self.options, owner, pdf).result()
+            outcome = "completed"
+            return result
+        except DOSSIER_ERRORS:
+            # The upload's fault, not a failure of the service
+            outcome = "invalid"
+            raise
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.counters[outcome] += 1
+                self.seconds += time.perf_counter() - start
+
+    def metrics(self):
+        with self.lock:
+            finished = self.counters["completed"] + self.counters["failed"] + self.counters["invalid"]
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                # Requests waiting for a free worker
+                "queue_depth": max(self.in_flight - self.workers, 0),
+                **self.counters,
+                "mean_seconds": self.seconds / finished if finished else 0.0,
+            }
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """
+    POST /cv with the docx as the body returns the LaTeX source, or the PDF with
+    ?format=pdf. An X-Owner-Profile header may carry an owner profile as JSON
+    (see OwnerProfile). GET /metrics returns the pool's queue depth and counters.
+    """
+
+    service = None
+
+    def send_body(self, status, body, content_type="text/plain; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "5")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/metrics":
+            return self.send_body(404, b"Not found\n")
+        self.send_body(200, json.dumps(self.service.metrics(), indent=2).encode(), "application/json")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/cv":
+            return self.send_body(404, b"Not found\n")
+        output_format = parse_qs(url.query).get("format", ["tex"])[0]
+        if output_format not in ("tex", "pdf"):
+            return self.send_body(400, b"format must be tex or pdf\n")
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return self.send_body(411, b"Send the docx as the request body\n")
+        if length > MAX_UPLOAD_BYTES:
+            return self.send_body(413, f"Dossiers are limited to {MAX_UPLOAD_BYTES} bytes\n".encode())
+        docx_bytes = self.rfile.read(length)
+
+        owner = None
+        if self.headers.get("X-Owner-Profile"):
+            try:
+                owner = OwnerProfile(**json.loads(self.headers["X-Owner-Profile"]))
+            except (ValueError, TypeError) as error:
+                return self.send_body(400, f"Invalid X-Owner-Profile: {error}\n".encode())
+        if output_format == "pdf":
+            try:
+                find_tex_engine(self.service.options.tex_engine)
+            except RuntimeError as error:
+                return self.send_body(501, f"{error}\n".encode())
+
+        try:
+            result = self.service.convert(docx_bytes, owner, output_format == "pdf")
+        except DOSSIER_ERRORS as error:
+            return self.send_body(422, f"Could not read the dossier: {type(error).__name__}: {error}\n".encode())
+        except Exception as error:
+            return self.send_body(500, f"Could not convert the dossier: {type(error).__name__}: {error}\n".encode())
+        if result is None:
+            return self.send_body(503, b"Too many conversions queued, try again shortly\n")
+        if output_format == "pdf":
+            return self.send_body(200, result, "application/pdf")
+        self.send_body(200, result, "application/x-tex; charset=utf-8")
+
+def serve(args):
+    """
+    Run the conversion service on args.host:args.serve until interrupted, with
+    args.jobs warm worker processes and up to args.max_queue waiting requests.
+    """
+    # Each request is one dossier built sequentially on one worker. Uploads are not
+    # written to the dossier cache, which is never pruned and would keep every one
+    options = argparse.Namespace(**{**vars(args), "jobs": 1, "incremental": False, "split_sections": False,
+                                    "mentee_report": None, "no_cache": True})
+    service = ConversionService(options, max(args.jobs, 1), args.max_queue)
+    handler = type("Handler", (ConversionHandler,), {"service": service})
+    server = ThreadingHTTPServer((args.host, args.serve), handler)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}/cv with {service.workers} workers "
+          f"(queue limit {service.max_queue}, metrics at /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping")
+    finally:
+        server.server_close()
+        service.pool.shutdown()
+
+def main():
+    args = parse_arguments()
+    configure_worker(args.profile_regex, args.entry_time_budget)
+    if args.batch:
+        sys.exit(run_batch(args))
+    if args.watch:
+        return watch(args)
+    if args.serve is not None:
+        return serve(args)
+
+    owner = OwnerProfile.load(args.owner) if args.owner else DEFAULT_OWNER
+    build_cv_file(args.input, args.output, args, owner)
+    if args.pdf:
+        # With split sections the ones changed since the last compile are previewed first
+        try:
+            compile_latex(args.output, args.tex_engine, args.build_dir, use_format=not args.no_format)
+        except RuntimeError as error:
+            sys.exit(str(error))
+
+    if args.report:
+        print(PIPELINE_STATS.format_table())
+    if args.report_json:
+        with open(args.report_json, 'w') as file:
+            json.dump(PIPELINE_STATS.as_dict(), file, indent=2)
     # # clean up the service section to remove extra text
     #text = clean_service_section(text)
 
     # # replace straight quotes with latex quotes
     # #text = replace_straight_quotes_with_latex_quotes(text)
     
-    # # add emphasis for mentees  - pick between astericks or underlines
-    # #text = highlight_mentored_authors_astericks2(text)
-    # text = underline_mentored_authors_with_note(text)
+    # # add emphasis for mentees  - pick between astericks or underlines with --mark-mentees
     
     # # format the professional section   
     #text = process_professional_section(text)
@@ -2894,4 +4832,3 @@ def main():
 if __name__ == "__main__":
     main()
 
-    
\ No newline at end of file
@@ -0,0 +1,399 @@
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+import Latest_Clean_LaTeX_CV as cv
+
+# Benchmark for the CV pipeline on synthetic dossiers of any size.
+#
+# The dossier generator writes a .docx laid out like the real faculty dossier,
+# using the marker constants the section builders search for, so every builder
+# has real work to do. Each extractor and the whole pipeline are timed for a
+# series of sizes and the growth between sizes is reported, which makes
+# quadratic behaviour stand out long before it hurts on the real CV. Single
+# publication entries with pathologically long author lists are timed the same way.
+#
+#   python benchmark_cv.py --publications 100 1000 5000 20000
+#   python benchmark_cv.py --publications 2000 --grants 50 --repeat 3 --json bench.json
+
+LAST_NAMES = ["Martin", "Hannah", "Ellis", "Zuidema", "Fournier", "Lovett", "Norris", "Dolack",
+              "Gerber", "Yuchi", "Menghani", "Dasans", "Schuster", "Baker", "Newman", "Ejima",
+              "Muñoz", "García", "Schäfer", "Müller", "Peña", "Öztürk", "Ramírez", "Çelik"]
+INITIALS = ["A.", "B.", "C. D.", "J.", "M.", "N.", "R.", "S. T.", "V.", "Z."]
+OWNER = "Kraft, R. H."
+STUDENT_ROLES = ["(Primary Author - Graduate Student)", "(Co-Author - Undergraduate Student)",
+                 "(Student Author - Graduate Student)", "(Co-Author - Postdoctoral Student)"]
+TOPICS = ["finite element modeling of", "a computational study of", "machine learning surrogates for",
+          "high strain rate response of", "uncertainty quantification in", "multiscale simulation of"]
+SUBJECTS = ["brain tissue", "composite armor", "spinal discs", "bone growth", "neural networks",
+            "gasket interfaces", "helmet liners", "Kolsky bar experiments"]
+VENUES = ["Journal of Biomechanics", "Fibers and Polymers", "Computer Methods in Biomechanics",
+          "Journal of Dynamic Behavior of Materials", "Annals of Biomedical Engineering"]
+MONTHS = ["January", "March", "April", "June", "August", "October", "November", "December"]
+COURSES = ["330", "360", "461", "563", "497", "440", "596", "494"]
+COMMITTEES = ["Promotion and Tenure Committee", "Research Advancement Committee",
+              "Teaching Load Policy Committee", "Facilities Committee", "Graduate Admissions Committee"]
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+def paragraph_xml(text):
+    # Tabs become <w:tab/> like the numbered entries in the real dossier
+    if not text:
+        return "<w:p/>"
+    pieces = [f'<w:t xml:space="preserve">{escape(piece)}</w:t>' if piece else "" for piece in text.split("\t")]
+    return "<w:p><w:r>" + "<w:tab/>".join(pieces) + "</w:r></w:p>"
+
+def table_xml(rows):
+    # A cell with several lines is several paragraphs, as in Word
+    xml = ["<w:tbl>"]
+    for row in rows:
+        xml.append("<w:tr>")
+        for cell in row:
+            xml.append("<w:tc>" + "".join(paragraph_xml(line) for line in cell.split("\n")) + "</w:tc>")
+        xml.append("</w:tr>")
+    xml.append("</w:tbl>")
+    return "".join(xml)
+
+def write_docx(path, blocks):
+    # Minimal WordprocessingML package: content types, package relationships and the body
+    body = "".join(table_xml(content) if kind == "table" else paragraph_xml(content) for kind, content in blocks)
+    document = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<w:document xmlns:w="{W_NS}"><w:body>{body}<w:sectPr/></w:body></w:document>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", CONTENT_TYPES)
+        docx.writestr("_rels/.rels", PACKAGE_RELS)
+        docx.writestr("word/document.xml", document)
+
+def scaled_counts(publications, presentations=None, grants=None, courses=None, students=None,
+                  service=None, awards=None):
+    # Anything not given explicitly keeps roughly the proportions of the real dossier
+    return {
+        "publications": publications,
+        "presentations": publications if presentations is None else presentations,
+        "grants": max(1, publications // 4) if grants is None else grants,
+        "courses": max(1, publications // 2) if courses is None else courses,
+        "students": max(1, publications // 2) if students is None else students,
+        "service": publications if service is None else service,
+        "awards": max(1, publications // 10) if awards is None else awards,
+    }
+
+def generate_dossier_blocks(counts, seed=0):
+    """
+    Blocks ("paragraph", text) / ("table", rows) of a synthetic dossier with the
+    given number of entries per section.
+    """
+    rng = random.Random(seed)
+    blocks = []
+
+    def name():
+        return f"{rng.choice(LAST_NAMES)}, {rng.choice(INITIALS)}"
+
+    def title():
+        return f"{rng.choice(TOPICS).capitalize()} {rng.choice(SUBJECTS)}"
+
+    def date_range():
+        start = rng.randint(2005, 2022)
+        return f"({rng.choice(MONTHS)} {start} - {rng.choice(MONTHS)} {start + rng.randint(1, 3)})"
+
+    def paragraphs(*lines):
+        blocks.extend(("paragraph", line) for line in lines)
+
+    def marker(text):
+        # Multi-line markers ("...\n\nTeaching") span several paragraphs
+        paragraphs(*text.split("\n"))
+
+    def entries(lines):
+        # Entries are separated by empty paragraphs as in the real dossier
+        for line in lines:
+            paragraphs(line, "")
+
+    def authors():
+        people = [name() for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.6:
+            people[rng.randrange(len(people))] += " " + rng.choice(STUDENT_ROLES)
+        people.insert(rng.randrange(len(people) + 1), OWNER)
+        return ", ".join(people[:-1]) + ", & " + people[-1]
+
+    def publication(number):
+        doi = f" DOI: 10.{rng.randint(1000, 9999)}/{rng.randint(100000, 999999)}" if rng.random() < 0.7 else ""
+        return f"{number}.\t{authors()} ({rng.randint(2005, 2024)}). {title()}. {rng.choice(VENUES)}.{doi} "
+
+    # Tables read by the position, education and professional-positions builders
+    blocks.append(("table", [["Last Name", "First Name and Initial", "Exact Rank and Title of Position", "Date"],
+                             ["Kraft", "Reuben H.", "Professor of Mechanical Engineering", "July 2024"]]))
+    blocks.append(("table", [["Name and City/State of Institution", "Major Subjects", "Minor Subjects", "Degrees - Dates"],
+                             ["Penn State, University Park, PA", "Mechanical Engineering", "", "Ph.D., August 2005 - May 2009"],
+                             ["Cornell University, Ithaca, NY", "Post-Doctoral", "", "Post-Doctoral, June 2009 - May 2010"]]))
+    employers = [["Previous Employers with City/State\nIncluding U.S. Military\n(Most Recent First)",
+                  "Work Performed: If Teacher, List Subjects Taught", "Rank or Title", "Dates"]]
+    for year in range(2010, 2024, 2):
+        employer = rng.choice(["Penn State, University Park, PA", "U.S. Army Research Laboratory, Aberdeen, MD",
+                               "Sandia National Laboratories, Albuquerque, NM"])
+        rank = rng.choice(["Associate Professor", "Mechanical Engineer", "Research Scientist"])
+        employers.append([employer, "Research", rank, f"August {year} - July {year + 2}"])
+    blocks.append(("table", employers))
+
+    # Teaching: semesters with several course sections each
+    marker(cv.COURSE_MARKERS[0])
+    semesters = [f"{season} {year}" for year in range(2024, 1900, -1) for season in ("Fall", "Spring")]
+    per_semester = 6
+    for index in range(counts["courses"]):
+        if index % per_semester == 0:
+            paragraphs(semesters[index // per_semester % len(semesters)])
+        course = rng.choice(COURSES)
+        paragraphs(f"ME {course}-00{index % 9 + 1}, Computational Tools, UP. 3 credits, "
+                   f"{rng.randint(5, 240)} Student(s), 100% responsibility, Primary Instructor, In Person, Lecture. ")
+    marker(cv.COURSE_MARKERS[1])
+
+    awards_per_group = max(1, counts["awards"] // len(cv.AWARD_MARKERS))
+
+    def award_group(start_marker, end_marker):
+        marker(start_marker)
+        entries(f"{title()} Award, Society of Engineering Science. ({rng.randint(2005, 2024)})."
+                for _ in range(awards_per_group))
+        marker(end_marker)
+
+    award_group(*cv.AWARD_MARKERS[0])
+
+    # Directed student learning: students spread over the advising subsections
+    students_per_group = max(1, counts["students"] // len(cv.DIRECTED_LEARNING_MARKERS))
+    for start_marker, _ in cv.DIRECTED_LEARNING_MARKERS:
+        marker(start_marker)
+        if "Ph.D." in start_marker:
+            degree = "Ph.D."
+        elif "Master" in start_marker:
+            degree = "MS."
+        else:
+            degree = "Undergraduate."
+        entries(f"{name()}, {degree} {title()}. {date_range()}." for _ in range(students_per_group))
+    marker(cv.DIRECTED_LEARNING_MARKERS[-1][1])
+
+    # Publications, in dossier order: journal, book chapters, conference proceedings, other
+    per_category = max(1, counts["publications"] // 4)
+    marker(cv.PUBLICATION_MARKERS["Journal Article"][0])
+    entries(publication(number) for number in range(1, counts["publications"] - 3 * per_category + 1))
+    marker(cv.PUBLICATION_MARKERS["Journal Article"][1])
+    marker(cv.PUBLICATION_MARKERS["Book Chapters"][0])
+    entries(publication(number) for number in range(1, per_category + 1))
+    marker(cv.PUBLICATION_MARKERS["Book Chapters"][1])
+    entries(publication(number) for number in range(1, per_category + 1))
+    marker(cv.PUBLICATION_MARKERS["Other"][0])
+    entries(publication(number) for number in range(1, per_category + 1))
+    marker(cv.PUBLICATION_MARKERS["Other"][1])
+
+    # Presentations: every category between consecutive markers
+    categories = list(cv.PRESENTATION_MARKERS.values())
+    per_category = max(1, counts["presentations"] // len(categories))
+    for start_marker, _ in categories:
+        marker(start_marker)
+        entries(f"{authors()} ({rng.choice(MONTHS)} {rng.randint(2005, 2024)}). \"{title()},\" "
+                f"{rng.choice(VENUES)} Conference, Annapolis, MD. " for _ in range(per_category))
+    marker(categories[-1][1])
+
+    # Grants
+    marker(cv.GRANT_MARKERS[0])
+    paragraphs("Awarded", "")
+    for _ in range(counts["grants"]):
+        paragraphs(f"Agency: {rng.choice(['Air Force Research Laboratory', 'National Science Foundation', 'Office of Naval Research'])}",
+                   "Principal Investigator: Kraft, Reuben H.",
+                   f"Co-Investigator(s): {name()}",
+                   f"Project Title: {title()}",
+                   f"OSP Number: {rng.randint(100000, 999999)}, Total awarded: ${rng.randint(10, 900)},000.00.",
+                   "")
+    marker(cv.GRANT_MARKERS[1])
+
+    marker(cv.IMPACT_MARKERS[0])
+    paragraphs(f"Work on {title().lower()} informed 100% of the #1 standards & guidelines.")
+    marker(cv.IMPACT_MARKERS[1])
+
+    award_group(*cv.AWARD_MARKERS[1])
+
+    # Service to the university, society and the profession share the service entries
+    per_group = max(1, counts["service"] // 3)
+    marker(cv.SERVICE_TO_UNI_MARKERS[0])
+    for heading in ("Department", "College", "University"):
+        paragraphs(heading, "")
+        entries(f"{rng.choice(COMMITTEES)}, Member. {date_range()}." for _ in range(per_group // 3 + 1))
+    marker(cv.SERVICE_TO_SOCIETY_MARKERS[0])
+    paragraphs("Participation in Community Affairs", "")
+    entries(f"Volunteer, {title()} Outreach Day. {date_range()}." for _ in range(per_group))
+    marker(cv.SERVICE_TO_DISCIPLINE_MARKERS[0])
+    paragraphs("Organizing Conferences and Service on Conference Committees", "")
+    entries(f"Session Chair, {rng.choice(VENUES)} Symposium. {date_range()}." for _ in range(per_group))
+    marker(cv.SERVICE_TO_DISCIPLINE_MARKERS[1])
+
+    award_group(cv.AWARD_MARKERS[2][0], cv.AWARD_MARKERS[3][0])
+    entries(f"Reviewer, {rng.choice(VENUES)}. ({rng.randint(2005, 2024)})." for _ in range(awards_per_group))
+    marker(cv.AWARD_MARKERS[3][1])
+
+    return blocks
+
+def run_pipeline(docx_path, repeat=1):
+    """
+    Run the same stages as main() on docx_path, timing the dossier read, the
+    section index, every section builder and the final render. The best of
+    `repeat` runs is kept for each stage.
+    """
+    best = {}
+    counters = {}
+    regex = {}
+    for _ in range(repeat):
+        timings = cv.PipelineStats()
+        # Start from a cold section index so building it is part of the measurement
+        cv._section_indexes.clear()
+        pipeline_start = time.perf_counter()
+
+        with timings.stage("read_word_document"):
+            dossier = cv.load_dossier(docx_path, cache_dir=None)
+
+        with timings.stage("template"):
+            document = cv.LatexDocument(cv.latex_preamble())
+
+        with timings.stage("section index"):
+            stages = cv.section_stages(dossier.text, dossier.tables)
+
+        for stage in stages:
+            document, stats = cv.run_section_stage(stage, document)
+            timings.merge(stats)
+
+        with timings.stage("render"):
+            document.render()
+        timings.add_timing("pipeline", time.perf_counter() - pipeline_start, 0.0)
+
+        for name, (wall, _, _) in timings.timings.items():
+            best[name] = min(best.get(name, wall), wall)
+        counters = timings.counters
+        regex = {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in timings.regex.items()}
+    return best, counters, regex
+
+# Author lists that once sent the entry parser into backtracking, as a function of
+# their length in words; they have to stay linear like the dossier stages
+LONG_ENTRIES = {
+    "no separators": lambda words: "1. " + "Smith " * words + "(2020). T. V.",
+    "student authors": lambda words: "1. " + "Smith, J. (Co-Author - Graduate Student), " * (words // 6) + "(2020). T. V.",
+    "no year": lambda words: "1. " + "& Smith, J" * (words // 3) + " T. V.",
+}
+
+def time_long_entries(word_counts):
+    # Seconds to parse and format one entry of each shape and length
+    timings = {}
+    for shape, make_entry in LONG_ENTRIES.items():
+        timings[shape] = []
+        for words in word_counts:
+            entry = make_entry(words)
+            start = time.perf_counter()
+            cv.Publication.from_entry(entry, "Journal Article").latex()
+            timings[shape].append(time.perf_counter() - start)
+    return timings
+
+def format_long_entries(word_counts, timings):
+    width = max(len(shape) for shape in list(timings) + ["Entry words"])
+    lines = [f"{'Entry words':<{width}}  " + "  ".join(f"{words:>9d}" for words in word_counts) + "  Exponent"]
+    for shape, times in timings.items():
+        exponent = growth_exponent(word_counts, times)
+        flag = "" if exponent is None else f"  {exponent:8.2f}" + ("  <- superlinear" if exponent > 1.5 else "")
+        lines.append(f"{shape:<{width}}  " + "  ".join(f"{seconds:9.4f}" for seconds in times) + flag)
+    return "\n".join(lines)
+
+def growth_exponent(sizes, times):
+    # Slope of log(time) against log(size) between the smallest and largest run:
+    # about 1 for linear work, about 2 for quadratic work
+    if len(sizes) < 2 or sizes[0] == sizes[-1] or min(times[0], times[-1]) < 1e-4:
+        return None
+    return math.log(times[-1] / times[0]) / math.log(sizes[-1] / sizes[0])
+
+def format_results(results):
+    sizes = [result["counts"]["publications"] for result in results]
+    stages = list(results[0]["timings"])
+    width = max(len(stage) for stage in stages + ["paragraphs"])
+    lines = [f"{'Publications':<{width}}  " + "  ".join(f"{size:>9d}" for size in sizes) + "  Exponent"]
+    lines.append(f"{'docx size (kB)':<{width}}  " + "  ".join(f"{result['docx_bytes'] / 1024:9.0f}" for result in results))
+    for stage in stages:
+        times = [result["timings"].get(stage, 0.0) for result in results]
+        exponent = growth_exponent(sizes, times)
+        flag = "" if exponent is None else f"  {exponent:8.2f}" + ("  <- superlinear" if exponent > 1.5 else "")
+        lines.append(f"{stage:<{width}}  " + "  ".join(f"{seconds:9.4f}" for seconds in times) + flag)
+    return "\n".join(lines)
+
+def format_regex_profile(result):
+    # Slowest pattern first
+    patterns = sorted(result["regex"].items(), key=lambda item: -item[1]["seconds"])
+    width = max([len(name) for name, _ in patterns] + [len("Regex")])
+    lines = [f"{'Regex':<{width}}  {'Time (s)':>9}  {'Calls':>9}   ({result['counts']['publications']} publications)"]
+    for name, profile in patterns:
+        lines.append(f"{name:<{width}}  {profile['seconds']:9.4f}  {profile['calls']:9d}")
+    return "\n".join(lines)
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Time the CV pipeline on synthetic dossiers of increasing size.")
+    parser.add_argument("--publications", type=int, nargs="+", default=[100, 1000, 5000, 20000],
+                        help="dossier sizes to run, as the number of publications (default: %(default)s)")
+    for section in ("presentations", "grants", "courses", "students", "service", "awards"):
+        parser.add_argument(f"--{section}", type=int,
+                            help=f"fixed number of {section} entries (default: scaled with the publications)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs per size, the fastest time of each stage is kept (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the dossier generator")
+    parser.add_argument("--keep", metavar="DIR", help="write the generated dossiers to DIR instead of a temporary directory")
+    parser.add_argument("--profile-regex", action="store_true",
+                        help="time every named regex and list the slowest ones for the largest dossier")
+    parser.add_argument("--entry-words", type=int, nargs="+", default=[1000, 4000, 16000],
+                        help="lengths in words of the pathological single entries to time (default: %(default)s)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON to PATH")
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_arguments()
+    cv.REGEX.profile = args.profile_regex
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = args.keep or temp_dir
+        os.makedirs(work_dir, exist_ok=True)
+
+        results = []
+        for publications in sorted(args.publications):
+            counts = scaled_counts(publications, args.presentations, args.grants, args.courses,
+                                   args.students, args.service, args.awards)
+            docx_path = os.path.join(work_dir, f"dossier_{publications}.docx")
+            write_docx(docx_path, generate_dossier_blocks(counts, args.seed))
+
+            print(f"Running {publications} publications ...", flush=True)
+            timings, counters, regex = run_pipeline(docx_path, args.repeat)
+            results.append({"counts": counts, "docx_bytes": os.path.getsize(docx_path),
+                            "timings": timings, "counters": counters, "regex": regex})
+
+    entry_words = sorted(args.entry_words)
+    long_entries = time_long_entries(entry_words)
+
+    print()
+    print(format_results(results))
+    print()
+    print(format_long_entries(entry_words, long_entries))
+    if args.profile_regex:
+        print()
+        print(format_regex_profile(results[-1]))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == "__main__":
+    main()